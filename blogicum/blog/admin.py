@@ -4,13 +4,45 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group, User
 from django.utils.safestring import mark_safe
+from django.utils.text import capfirst
 
-from .models import Category, Location, Post, Comment
+from .deletion import dependent_counts, schedule_deletion
+from .models import Category, Location, Post, Comment, DeletionTask
 
 admin.site.unregister(User)
 admin.site.unregister(Group)
 
 
+class ScheduledDeletionMixin:
+    """Удаление из админки через фоновую задачу вместо каскада в запросе."""
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj)
+
+    def get_deleted_objects(self, objs, request):
+        # Полный обход каскада загрузил бы в память все публикации и
+        # комментарии; для подтверждения хватает счётчиков первого уровня.
+        objs = list(objs)
+        opts = self.model._meta
+        model_count = {opts.verbose_name_plural: len(objs)}
+        for model, count in dependent_counts(
+                self.model, [obj.pk for obj in objs]).items():
+            if count:
+                model_count[model._meta.verbose_name_plural] = count
+        deleted_objects = [
+            f'{capfirst(opts.verbose_name)}: {obj} — удаление в фоне'
+            for obj in objs
+        ]
+        perms_needed = (
+            set() if self.has_delete_permission(request)
+            else {opts.verbose_name})
+        return deleted_objects, model_count, perms_needed, []
+
+
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_published')
@@ -26,11 +58,12 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ScheduledDeletionMixin, admin.ModelAdmin):
     list_display = ('title', 'author', 'category', 'pub_date', 'is_published')
     search_fields = ('title', 'author__username', 'category__title')
     list_filter = ('is_published', 'pub_date', 'category')
     list_display_links = ('title', 'author')
+    list_select_related = ('author', 'category')
 
     def image_preview(self, obj: Any) -> Optional[str]:
         if hasattr(obj, 'image') and obj.image:
@@ -42,13 +75,41 @@ class PostAdmin(admin.ModelAdmin):
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
-    list_display = ('username', 'email', 'is_staff', 'posts_count')
+class UserAdmin(ScheduledDeletionMixin, BaseUserAdmin):
+    list_display = ('username', 'email', 'is_staff', 'posts_count',
+                    'published_posts', 'comments_written',
+                    'comments_received', 'last_post_date')
     search_fields = ('username', 'email')
+    list_select_related = ('stats',)
+
+    @staticmethod
+    def stat(obj, name):
+        stats = getattr(obj, 'stats', None)
+        return getattr(stats, name) if stats else None
 
-    @admin.display(description='Кол-во постов')
+    @admin.display(description='Кол-во постов', ordering='stats__total_posts')
     def posts_count(self, obj):
-        return obj.posts.count()
+        return self.stat(obj, 'total_posts')
+
+    @admin.display(description='Опубликовано',
+                   ordering='stats__published_posts')
+    def published_posts(self, obj):
+        return self.stat(obj, 'published_posts')
+
+    @admin.display(description='Написано комментариев',
+                   ordering='stats__comments_written')
+    def comments_written(self, obj):
+        return self.stat(obj, 'comments_written')
+
+    @admin.display(description='Получено комментариев',
+                   ordering='stats__comments_received')
+    def comments_received(self, obj):
+        return self.stat(obj, 'comments_received')
+
+    @admin.display(description='Последняя публикация',
+                   ordering='stats__last_post_date')
+    def last_post_date(self, obj):
+        return self.stat(obj, 'last_post_date')
 
 
 @admin.register(Comment)
@@ -56,5 +117,17 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ('id', 'post', 'author', 'created_at')
     search_fields = ('text', 'author__username', 'post__title')
     list_filter = ('created_at', 'post')
+    list_select_related = ('post', 'author')
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
+
+
+@admin.register(DeletionTask)
+class DeletionTaskAdmin(admin.ModelAdmin):
+    list_display = ('description', 'model', 'status', 'deleted_rows',
+                    'batches', 'created_at', 'finished_at')
+    list_filter = ('status', 'model')
+    readonly_fields = [field.name for field in DeletionTask._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -5,3 +5,22 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from django.db.models.signals import (post_delete, post_save,
+                                              pre_delete, pre_save)
+
+        from . import checks, reference, stats  # noqa: F401
+        from .models import Category, Comment, Location, Post
+
+        for model in (Category, Location):
+            post_save.connect(reference.reference_changed, sender=model)
+            post_delete.connect(reference.reference_changed, sender=model)
+        pre_save.connect(stats.post_saving, sender=Post)
+        post_save.connect(stats.post_saved, sender=Post)
+        post_delete.connect(stats.post_deleted, sender=Post)
+        post_save.connect(stats.comment_saved, sender=Comment)
+        post_delete.connect(stats.comment_deleted, sender=Comment)
+        post_save.connect(stats.category_changed, sender=Category)
+        pre_delete.connect(stats.category_deleting, sender=Category)
+        post_delete.connect(stats.category_deleted, sender=Category)
@@ -0,0 +1,8 @@
+from django.core.checks import Tags, register
+
+from core.checks import per_process_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_reference_cache(app_configs, **kwargs):
+    return per_process_cache('blog.reference', 'default', 'blog.E001')
@@ -1,3 +1,4 @@
 POSTS_PER_PAGE = 10
 MAX_FIELD_LENGTH = 256
 CUT_BOUNDARY_STR = 20
+LATEST_POSTS_PER_CATEGORY = 3
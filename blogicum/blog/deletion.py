@@ -0,0 +1,150 @@
+"""Фоновое каскадное удаление публикаций и пользователей.
+
+schedule_deletion() сразу скрывает объект (и, для пользователя, все его
+публикации и комментарии) и ставит DeletionTask. process_task() удаляет
+зависимые строки пачками, начиная с самых глубоких уровней каскада, и
+только потом сам объект: ни одна транзакция не держит блокировку записи
+дольше одной пачки, а сборщику Django не приходится загружать в память
+все комментарии сразу. Состояние не хранится между пачками — каждая
+пачка заново находит, что осталось, поэтому прерванную задачу можно
+просто запустить ещё раз. Обработчик забирает задачу условным UPDATE,
+и одну задачу не выполняют двое.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import CASCADE, Q
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+
+from core.writes import write
+
+from . import stats
+from .models import Comment, DeletionTask, Post, User
+
+
+def hide(obj):
+    if isinstance(obj, Post):
+        posts = Post.objects.filter(pk=obj.pk)
+        comments = Comment.objects.filter(post=obj)
+    elif isinstance(obj, User):
+        obj.is_active = False
+        obj.save(update_fields=['is_active'])
+        posts = Post.objects.filter(author=obj)
+        comments = Comment.objects.filter(Q(author=obj) | Q(post__author=obj))
+    else:
+        raise TypeError(f'Фоновое удаление {type(obj).__name__} '
+                        'не поддерживается.')
+    author_ids, category_ids = set(), set()
+    for author_id, category_id in posts.values_list(
+            'author_id', 'category_id'):
+        author_ids.add(author_id)
+        category_ids.add(category_id)
+    for author_id, post_author_id in comments.values_list(
+            'author_id', 'post__author_id').distinct():
+        author_ids.update((author_id, post_author_id))
+    posts.update(is_deleted=True)
+    comments.update(is_deleted=True)
+    stats.build_authors(author_ids)
+    stats.refresh_categories(category_ids - {None})
+
+
+def schedule_deletion(obj):
+    """Скрывает объект и ставит задачу в одной транзакции записи."""
+    def schedule():
+        hide(obj)
+        return DeletionTask.objects.create(
+            model=obj._meta.label_lower, object_id=obj.pk,
+            description=str(obj),
+        )
+    return write(schedule)
+
+
+def scheduled(model):
+    """Id объектов модели, которые ждут фонового удаления."""
+    return DeletionTask.objects.filter(
+        model=model._meta.label_lower
+    ).exclude(status=DeletionTask.DONE).values('object_id')
+
+
+def dependent_counts(model, pks):
+    """Сколько строк каскад удалит на первом уровне, по моделям."""
+    counts = {}
+    for related in get_candidate_relations_to_delete(model._meta):
+        if related.field.remote_field.on_delete is not CASCADE:
+            continue
+        related_model = related.related_model
+        counts[related_model] = counts.get(related_model, 0) + (
+            related_model._base_manager.filter(
+                **{f'{related.field.name}__in': pks}).count())
+    return counts
+
+
+def delete_batch(model, queryset, batch_size):
+    """Удаляет до batch_size строк с самого глубокого уровня каскада."""
+    for related in get_candidate_relations_to_delete(model._meta):
+        if related.field.remote_field.on_delete is not CASCADE:
+            continue
+        children = related.related_model._base_manager.filter(
+            **{f'{related.field.name}__in': queryset.values('pk')})
+        deleted = delete_batch(related.related_model, children, batch_size)
+        if deleted:
+            return deleted
+    pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+    if not pks:
+        return 0
+    return model._base_manager.filter(pk__in=pks).delete()[0]
+
+
+def claim(task):
+    """Переводит задачу в RUNNING, если её не держит другой обработчик.
+
+    Условный UPDATE сверяет статус и время изменения с прочитанными, так
+    что из двух обработчиков задачу получает один. Задачу в RUNNING,
+    которую дольше DELETION_TASK_LEASE не обновляли, бросил упавший
+    обработчик, и её можно забрать.
+    """
+    now = timezone.now()
+    tasks = DeletionTask.objects.filter(
+        pk=task.pk, status=task.status, updated_at=task.updated_at)
+    if task.status == DeletionTask.RUNNING:
+        tasks = tasks.filter(updated_at__lt=now - timedelta(
+            seconds=settings.DELETION_TASK_LEASE))
+    if not write(tasks.update, status=DeletionTask.RUNNING, updated_at=now):
+        return False
+    task.status, task.updated_at = DeletionTask.RUNNING, now
+    return True
+
+
+def process_task(task, batch_size, max_batches=None):
+    """Удаляет пачки, пока задача не завершится или не кончится лимит.
+
+    Возвращает None, если задачу уже выполняет другой обработчик. Задача,
+    не завершённая за max_batches пачек, возвращается в очередь.
+    """
+    if not claim(task):
+        return None
+    model = apps.get_model(task.model)
+    queryset = model._base_manager.filter(pk=task.object_id)
+    try:
+        while max_batches is None or max_batches > 0:
+            deleted = write(delete_batch, model, queryset, batch_size)
+            if not deleted:
+                task.status = DeletionTask.DONE
+                task.finished_at = timezone.now()
+                break
+            task.deleted_rows += deleted
+            task.batches += 1
+            task.save(update_fields=['deleted_rows', 'batches', 'updated_at'])
+            if max_batches is not None:
+                max_batches -= 1
+    except Exception as error:
+        task.status = DeletionTask.FAILED
+        task.error = f'{type(error).__name__}: {error}'
+        raise
+    finally:
+        if task.status == DeletionTask.RUNNING:
+            task.status = DeletionTask.PENDING
+        task.save()
+    return task
@@ -0,0 +1,150 @@
+"""Ленты RSS и Atom: общая, по категории и по автору.
+
+ETag ленты строится из состояния базы: id, времени изменения и автора
+каждой публикации ленты и полей её владельца (категории или автора).
+Поэтому его одинаково вычисляет любой воркер, а отложенная публикация
+меняет ленту, как только наступает её время, без записи в базу. Условный
+запрос стоит одного запроса на FEED_ITEMS строк и отвечает 304, а готовый
+XML хранится в кэше под своим ETag.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, quote_etag)
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from .deletion import scheduled
+from .models import Post
+from .reference import published_category
+from .services import filter_published_posts
+
+FEED_BODY_KEY = 'blog.feeds.body:{}'
+DESCRIPTION_WORDS = 50
+
+
+def latest(posts):
+    return posts.order_by('-pub_date', '-pk')[:settings.FEED_ITEMS]
+
+
+def validators(request, owner, posts):
+    """Валидаторы ETag и Last-Modified по публикациям ленты и владельцу."""
+    rows = list(latest(posts).values_list(
+        'pk', 'updated_at', 'pub_date', 'author__username'))
+    if isinstance(owner, User):
+        owner_fields = (owner.username,)
+    elif owner is not None:
+        owner_fields = (owner.title, owner.description)
+    else:
+        owner_fields = ()
+    digest = hashlib.md5(
+        repr((request.path, owner_fields, rows)).encode()).hexdigest()
+    last_modified = max(
+        (max(updated_at, pub_date) for _, updated_at, pub_date, _ in rows),
+        default=None)
+    return quote_etag(digest), (
+        int(last_modified.timestamp()) if last_modified else None)
+
+
+def scope(category_slug=None, username=None):
+    """Объект ленты и её публикации по правилам filter_published_posts."""
+    if category_slug is not None:
+        category = published_category(category_slug)
+        if category is None:
+            raise Http404('Категория не найдена.')
+        return category, filter_published_posts(
+            Post.objects.filter(category=category))
+    if username is not None:
+        author = get_object_or_404(
+            User.objects.exclude(pk__in=scheduled(User)), username=username)
+        return author, filter_published_posts(
+            Post.objects.filter(author=author))
+    return None, filter_published_posts(Post.objects.all())
+
+
+class PostsFeed(Feed):
+    def get_object(self, request, category_slug=None, username=None):
+        return scope(category_slug, username)
+
+    def title(self, obj):
+        owner, _ = obj
+        if owner is None:
+            return 'Блогикум'
+        if isinstance(owner, User):
+            return f'Блогикум: публикации @{owner.username}'
+        return f'Блогикум: {owner.title}'
+
+    def link(self, obj):
+        owner, _ = obj
+        if owner is None:
+            return reverse('blog:index')
+        if isinstance(owner, User):
+            return reverse('blog:profile', args=[owner.username])
+        return reverse('blog:category_posts', args=[owner.slug])
+
+    def description(self, obj):
+        owner, _ = obj
+        return getattr(owner, 'description', '') or 'Новые публикации'
+
+    def items(self, obj):
+        _, posts = obj
+        return latest(posts).select_related('author')
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return Truncator(item.text).words(DESCRIPTION_WORDS)
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+
+class AtomPostsFeed(PostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def cached_feed(feed):
+    """Представление ленты с условными запросами и кэшем готового XML."""
+    def view(request, **kwargs):
+        etag, last_modified = validators(request, *scope(**kwargs))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            key = FEED_BODY_KEY.format(etag)
+            cached = cache.get(key)
+            if cached is None:
+                response = feed(request, **kwargs)
+                cache.set(key, (response.content, response['Content-Type']),
+                          settings.FEED_CACHE_TIMEOUT)
+            else:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True,
+                            max_age=settings.FEED_MAX_AGE)
+        return response
+    return view
+
+
+rss = cached_feed(PostsFeed())
+atom = cached_feed(AtomPostsFeed())
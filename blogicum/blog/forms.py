@@ -2,6 +2,7 @@ from django import forms
 from django.utils.timezone import now
 
 from .models import Post, Comment, Category
+from .reference import categories, locations
 
 
 class PostForm(forms.ModelForm):
@@ -19,9 +20,12 @@ class PostForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if not self.initial.get('pub_date'):
             self.initial['pub_date'] = now().strftime('%Y-%m-%dT%H:%M')
-        self.fields['category'].queryset = Category.objects.filter(
-            is_published=True
-        )
+        category = self.fields['category']
+        category.queryset = Category.objects.filter(is_published=True)
+        category.choices = categories.choices(
+            category, categories.published())
+        location = self.fields['location']
+        location.choices = locations.choices(location, locations.all())
 
 
 class CommentForm(forms.ModelForm):
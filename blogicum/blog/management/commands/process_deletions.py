@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.deletion import process_task
+from blog.models import DeletionTask
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задачи фонового удаления пачками. Прерванные задачи '
+        'продолжаются с того места, где остановились.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--max-batches', type=int,
+            help='Сколько пачек выполнить за одну задачу за проход.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Проверять очередь каждые N секунд, не завершаясь.'
+        )
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help='Повторить задачи, завершившиеся ошибкой.'
+        )
+
+    def handle(self, *args, **options):
+        statuses = [DeletionTask.PENDING, DeletionTask.RUNNING]
+        if options['retry_failed']:
+            statuses.append(DeletionTask.FAILED)
+        while True:
+            for task in DeletionTask.objects.filter(status__in=statuses):
+                task = process_task(
+                    task, options['batch_size'], options['max_batches'])
+                if task is None:
+                    continue
+                self.stdout.write(
+                    f'{task}: {task.get_status_display()}, удалено '
+                    f'{task.deleted_rows} строк за {task.batches} пачек.'
+                )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
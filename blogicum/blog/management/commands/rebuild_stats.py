@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from blog.stats import rebuild, roll_over
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает статистику авторов и сводки категорий с нуля: после '
+        'массовой загрузки данных в обход сигналов или для проверки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--due', action='store_true',
+            help='Пересчитать только строки, у которых наступила отложенная '
+                 'публикация; запускайте по расписанию.'
+        )
+
+    def handle(self, *args, **options):
+        if options['due']:
+            authors, categories = roll_over()
+        else:
+            authors, categories = rebuild(options['batch_size'])
+        self.stdout.write(
+            f'Пересчитано: авторов {authors}, категорий {categories}')
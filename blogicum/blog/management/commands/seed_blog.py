@@ -0,0 +1,209 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+from blog.reference import invalidate
+from blog.stats import rebuild
+
+User = get_user_model()
+
+WORDS = (
+    'город горы море лес река утро вечер дорога поезд музей парк кофе '
+    'книга друг дождь солнце ветер снег озеро мост улица площадь рынок '
+    'закат рассвет путь дом сад поле небо облако тишина шум свет тень'
+).split()
+
+SEED_PASSWORD = 'seed-password'
+FUTURE_POSTS_SHARE = 0.05
+UNPUBLISHED_POSTS_SHARE = 0.05
+UNPUBLISHED_CATEGORIES_SHARE = 0.1
+UNPUBLISHED_LOCATIONS_SHARE = 0.1
+NO_LOCATION_SHARE = 0.3
+HISTORY_DAYS = 3 * 365
+TEXT_POOL_SIZE = 1000
+FUTURE_DAYS = 60
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для рангов 1..size."""
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, size + 1)))
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, категориями, '
+        'местоположениями, публикациями и комментариями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель степени для распределений Ципфа.'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.zipf = options['zipf']
+        self.now = timezone.now()
+
+        users = self.create_users(options['users'])
+        categories = self.create_categories(options['categories'])
+        locations = self.create_locations(options['locations'])
+        if not users or not categories:
+            return
+        posts = self.create_posts(
+            options['posts'], users, categories, locations)
+        if posts:
+            self.create_comments(options['comments'], users, posts)
+        # bulk_create не отправляет сигналы, которые ведут статистику
+        # и сбрасывают справочники.
+        rebuild()
+        invalidate()
+
+    def texts(self, min_words, max_words):
+        """Пул готовых текстов: генерация на каждую строку слишком дорогая."""
+        return [
+            ' '.join(self.rng.choices(
+                WORDS, k=self.rng.randint(min_words, max_words)))
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+
+    def ranked(self, ids):
+        """Перемешивает id, чтобы ранг в распределении Ципфа был случайным."""
+        ids = list(ids)
+        self.rng.shuffle(ids)
+        return ids, zipf_cum_weights(len(ids), self.zipf)
+
+    def zipf_sample(self, ranked, size):
+        ids, cum_weights = ranked
+        return self.rng.choices(ids, cum_weights=cum_weights, k=size)
+
+    def bulk_insert(self, model, total, build):
+        start = next_pk(model)
+        for offset in range(0, total, self.batch_size):
+            pks = range(start + offset,
+                        start + min(offset + self.batch_size, total))
+            with transaction.atomic():
+                model.objects.bulk_create(build(pks))
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'{min(offset + self.batch_size, total)}/{total}'
+            )
+        return range(start, start + total)
+
+    def create_users(self, total):
+        password = make_password(SEED_PASSWORD)
+        return self.bulk_insert(User, total, lambda pks: [
+            User(
+                pk=pk,
+                username=f'seed_user_{pk}',
+                email=f'seed_user_{pk}@example.com',
+                password=password,
+                date_joined=self.now - timedelta(
+                    days=self.rng.uniform(0, HISTORY_DAYS)),
+            )
+            for pk in pks
+        ])
+
+    def create_categories(self, total):
+        descriptions = self.texts(5, 20)
+        return self.bulk_insert(Category, total, lambda pks: [
+            Category(
+                pk=pk,
+                title=f'Категория {pk}',
+                description=self.rng.choice(descriptions),
+                slug=f'seed-category-{pk}',
+                is_published=(
+                    self.rng.random() >= UNPUBLISHED_CATEGORIES_SHARE),
+            )
+            for pk in pks
+        ])
+
+    def create_locations(self, total):
+        return self.bulk_insert(Location, total, lambda pks: [
+            Location(
+                pk=pk,
+                name=f'Место {pk}',
+                is_published=self.rng.random() >= UNPUBLISHED_LOCATIONS_SHARE,
+            )
+            for pk in pks
+        ])
+
+    def pub_date(self):
+        if self.rng.random() < FUTURE_POSTS_SHARE:
+            return self.now + timedelta(
+                days=self.rng.uniform(0, FUTURE_DAYS))
+        return self.now - timedelta(days=self.rng.uniform(0, HISTORY_DAYS))
+
+    def location(self, locations):
+        if not locations or self.rng.random() < NO_LOCATION_SHARE:
+            return None
+        return self.rng.choice(locations)
+
+    def create_posts(self, total, users, categories, locations):
+        authors = self.ranked(users)
+        topics = self.ranked(categories)
+        locations = list(locations)
+        titles = self.texts(2, 6)
+        texts = self.texts(20, 200)
+
+        def build(pks):
+            return [
+                Post(
+                    pk=pk,
+                    title=self.rng.choice(titles).capitalize(),
+                    text=self.rng.choice(texts),
+                    pub_date=self.pub_date(),
+                    author_id=author_id,
+                    category_id=category_id,
+                    location_id=self.location(locations),
+                    is_published=(
+                        self.rng.random() >= UNPUBLISHED_POSTS_SHARE),
+                )
+                for pk, author_id, category_id in zip(
+                    pks,
+                    self.zipf_sample(authors, len(pks)),
+                    self.zipf_sample(topics, len(pks)),
+                )
+            ]
+
+        return self.bulk_insert(Post, total, build)
+
+    def create_comments(self, total, users, posts):
+        authors = self.ranked(users)
+        popular = self.ranked(posts)
+        texts = self.texts(3, 40)
+        return self.bulk_insert(Comment, total, lambda pks: [
+            Comment(
+                pk=pk,
+                post_id=post_id,
+                author_id=author_id,
+                text=self.rng.choice(texts),
+            )
+            for pk, post_id, author_id in zip(
+                pks,
+                self.zipf_sample(popular, len(pks)),
+                self.zipf_sample(authors, len(pks)),
+            )
+        ])
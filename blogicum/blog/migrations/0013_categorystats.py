@@ -0,0 +1,25 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_authorstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.category', verbose_name='Категория')),
+                ('published_posts', models.PositiveIntegerField(default=0, verbose_name='Опубликовано')),
+                ('latest_posts', models.JSONField(default=list, help_text='id последних опубликованных публикаций, новые первыми.', verbose_name='Последние публикации')),
+                ('next_publication', models.DateTimeField(blank=True, help_text='Когда она наступит, сводка пересчитается.', null=True, verbose_name='Ближайшая отложенная публикация')),
+            ],
+            options={
+                'verbose_name': 'сводка категории',
+                'verbose_name_plural': 'Сводки категорий',
+            },
+        ),
+    ]
@@ -7,6 +7,13 @@ from .constants import MAX_FIELD_LENGTH, CUT_BOUNDARY_STR
 User = get_user_model()
 
 
+class VisibleManager(models.Manager):
+    """Менеджер, скрывающий объекты, поставленные в очередь на удаление."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class CreatedAtModel(models.Model):
     """Абстрактная модель с полем даты создания."""
 
@@ -102,6 +109,10 @@ class Post(PublishedAndCreatedAtModel):
         null=True,
         blank=True
     )
+    is_deleted = models.BooleanField("Удаляется", default=False)
+    updated_at = models.DateTimeField("Изменено", auto_now=True)
+
+    objects = VisibleManager()
 
     class Meta:
         verbose_name = "публикация"
@@ -111,6 +122,13 @@ class Post(PublishedAndCreatedAtModel):
     def __str__(self):
         return self.title[:CUT_BOUNDARY_STR]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Значения из базы: по ним статистика считает сдвиги при сохранении.
+        post._loaded = dict(zip(field_names, values))
+        return post
+
 
 class Comment(CreatedAtModel):
     post = models.ForeignKey(
@@ -129,6 +147,9 @@ class Comment(CreatedAtModel):
         "Текст комментария",
         help_text="Введите текст комментария"
     )
+    is_deleted = models.BooleanField("Удаляется", default=False)
+
+    objects = VisibleManager()
 
     class Meta(CreatedAtModel.Meta):
         verbose_name = "комментарий"
@@ -137,3 +158,105 @@ class Comment(CreatedAtModel):
 
     def __str__(self):
         return self.text[:CUT_BOUNDARY_STR]
+
+
+class DeletionTask(models.Model):
+    """Фоновое удаление объекта вместе с зависимыми строками."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Завершено"),
+        (FAILED, "Ошибка"),
+    )
+
+    model = models.CharField("Модель", max_length=100)
+    object_id = models.PositiveBigIntegerField("Идентификатор объекта")
+    description = models.CharField("Объект", max_length=MAX_FIELD_LENGTH)
+    status = models.CharField(
+        "Статус", max_length=10, choices=STATUSES, default=PENDING,
+        db_index=True,
+    )
+    deleted_rows = models.PositiveBigIntegerField("Удалено строк", default=0)
+    batches = models.PositiveIntegerField("Пачек", default=0)
+    error = models.TextField("Ошибка", blank=True)
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+    finished_at = models.DateTimeField("Завершено", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "задача удаления"
+        verbose_name_plural = "Задачи удаления"
+        ordering = ("created_at",)
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}: {self.description}"
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора, которые обновляются при записи, а не при чтении."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Автор",
+    )
+    total_posts = models.PositiveIntegerField("Всего публикаций", default=0)
+    published_posts = models.PositiveIntegerField(
+        "Опубликовано", default=0)
+    comments_received = models.PositiveIntegerField(
+        "Получено комментариев", default=0)
+    comments_written = models.PositiveIntegerField(
+        "Написано комментариев", default=0)
+    last_post_date = models.DateTimeField(
+        "Последняя публикация", null=True, blank=True)
+    next_publication = models.DateTimeField(
+        "Ближайшая отложенная публикация",
+        null=True,
+        blank=True,
+        help_text="Когда она наступит, счётчики публикаций пересчитаются.",
+    )
+
+    class Meta:
+        verbose_name = "статистика автора"
+        verbose_name_plural = "Статистика авторов"
+
+    def __str__(self):
+        return str(self.author)
+
+
+class CategoryStats(models.Model):
+    """Сводка категории для каталога, которая обновляется при записи."""
+
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Категория",
+    )
+    published_posts = models.PositiveIntegerField(
+        "Опубликовано", default=0)
+    latest_posts = models.JSONField(
+        "Последние публикации", default=list,
+        help_text="id последних опубликованных публикаций, новые первыми.",
+    )
+    next_publication = models.DateTimeField(
+        "Ближайшая отложенная публикация",
+        null=True,
+        blank=True,
+        help_text="Когда она наступит, сводка пересчитается.",
+    )
+
+    class Meta:
+        verbose_name = "сводка категории"
+        verbose_name_plural = "Сводки категорий"
+
+    def __str__(self):
+        return str(self.category)
@@ -0,0 +1,142 @@
+"""Справочники (категории и местоположения) в памяти процесса.
+
+Таблицы крошечные и меняются редко, а нужны почти каждой странице, поэтому
+процесс держит их копию и отвечает на поиск по id и slug из словаря.
+Копия помечена версией из кэша по умолчанию: сохранение или удаление
+строки увеличивает версию (сразу и ещё раз после коммита), и каждый
+процесс, который делит этот кэш, перечитывает таблицу при следующем
+обращении. С кэшем в памяти процесса (LocMemCache из settings.py) версия
+у каждого воркера своя, и чужие изменения видны лишь через
+REFERENCE_CACHE_TIMEOUT, поэтому manage.py check --deploy требует общий
+кэш (blog.E001); settings_production его настраивает.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.query import ModelIterable
+
+from monitoring.queries import transparent
+
+from .models import Category, Location, Post
+
+VERSION_KEY = 'blog.reference.version'
+
+
+def _version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+class Table:
+    def __init__(self, version, rows, indexes):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = {row.pk: row for row in rows}
+        self.indexes = {
+            field: {getattr(row, field): row for row in rows}
+            for field in indexes
+        }
+
+    def is_fresh(self, version):
+        return (
+            self.version == version
+            and time.monotonic() - self.loaded_at
+            < settings.REFERENCE_CACHE_TIMEOUT
+        )
+
+
+class Reference:
+    """Копия таблицы справочника; объекты общие, изменять их нельзя."""
+
+    def __init__(self, model, indexes=()):
+        self.model = model
+        self.indexes = indexes
+        self._table = None
+        self._lock = threading.Lock()
+
+    def table(self):
+        version = _version()
+        table = self._table
+        if table is not None and table.is_fresh(version):
+            return table
+        with self._lock:
+            table = self._table
+            if table is None or not table.is_fresh(version):
+                table = self._table = Table(
+                    version, self.model._base_manager.order_by('pk'),
+                    self.indexes)
+        return table
+
+    def get(self, pk):
+        return self.table().rows.get(pk)
+
+    def lookup(self, field, value):
+        return self.table().indexes[field].get(value)
+
+    def all(self):
+        return list(self.table().rows.values())
+
+    def published(self):
+        return [row for row in self.all() if row.is_published]
+
+    def choices(self, field, rows):
+        """Варианты для ModelChoiceField без запроса к базе."""
+        choices = [(row.pk, field.label_from_instance(row)) for row in rows]
+        if field.empty_label is not None:
+            choices.insert(0, ('', field.empty_label))
+        return choices
+
+    def clear(self):
+        self._table = None
+
+
+categories = Reference(Category, indexes=('slug',))
+locations = Reference(Location)
+
+
+def published_category(slug):
+    category = categories.lookup('slug', slug)
+    return category if category and category.is_published else None
+
+
+class ReferenceIterable(ModelIterable):
+    """Подставляет публикациям категории и места из справочников.
+
+    Строки, которых в копии нет, останутся незагруженными и подтянутся
+    обычным запросом.
+    """
+
+    @transparent
+    def __iter__(self):
+        fields = ((Post.category.field, categories),
+                  (Post.location.field, locations))
+        for post in super().__iter__():
+            for field, reference in fields:
+                if field.is_cached(post):
+                    continue
+                row = reference.get(getattr(post, field.attname))
+                if row is not None:
+                    field.set_cached_value(post, row)
+            yield post
+
+
+def with_references(queryset):
+    """Публикации без JOIN справочников: они берутся из копии процесса."""
+    queryset = queryset._chain()
+    queryset._iterable_class = ReferenceIterable
+    return queryset
+
+
+def reference_changed(sender, **kwargs):
+    # Вторая инвалидация убирает копии, прочитанные до коммита.
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -1,26 +1,63 @@
-from django.db.models import Count
+from django.db.models import Count, Q
 from django.core.paginator import Paginator
+from django.http import HttpResponse, JsonResponse
+from django.template.loader import render_to_string
 from django.utils import timezone
 
+from . import reference
+
 
 def annotate_and_select_related(queryset):
 
-    return queryset.annotate(num_comments=Count('comments')).select_related(
-        'author', 'location', 'category'
-    ).order_by('-pub_date')
+    return reference.with_references(queryset.annotate(num_comments=Count(
+        'comments', filter=Q(comments__is_deleted=False)
+    )).select_related('author').order_by('-pub_date'))
+
+
+def published_posts_q(prefix=''):
+
+    return Q(**{
+        f'{prefix}pub_date__lte': timezone.now(),
+        f'{prefix}category__is_published': True,
+        f'{prefix}is_published': True,
+    })
 
 
 def filter_published_posts(queryset):
 
-    return queryset.filter(
-        pub_date__lte=timezone.now(),
-        category__is_published=True,
-        is_published=True
-    )
+    return queryset.filter(published_posts_q())
 
 
-def paginate_queryset(queryset, request, per_page):
+def paginate_queryset(queryset, request, per_page, count=None):
 
     page_number = request.GET.get('page')
     paginator = Paginator(queryset, per_page)
+    if count is not None:
+        paginator.count = count
     return paginator.get_page(page_number)
+
+
+def fragment_format(request):
+
+    if 'application/json' in request.headers.get('Accept', ''):
+        return 'json'
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return 'html'
+    return None
+
+
+def comment_fragment(request, comment, status=200):
+
+    html = render_to_string(
+        'includes/comment.html', {'comment': comment}, request=request)
+    if fragment_format(request) == 'json':
+        return JsonResponse({'id': comment.id, 'html': html}, status=status)
+    return HttpResponse(html, status=status)
+
+
+def form_errors_fragment(request, form):
+
+    if fragment_format(request) == 'json':
+        return JsonResponse({'errors': form.errors.get_json_data()},
+                            status=400)
+    return HttpResponse(form.errors.as_ul(), status=400)
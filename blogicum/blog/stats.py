@@ -0,0 +1,407 @@
+"""Статистика авторов и категорий, которая поддерживается при записи.
+
+Сохранение или удаление публикации сдвигает счётчики автора и категории
+через F() на разницу между прежним состоянием публикации (запомненным при
+загрузке из базы) и новым, без агрегатов по всем публикациям автора или
+категории. Счётчики комментариев сдвигаются так же. Публикации с датой
+в будущем становятся видимыми без записи в базу, поэтому в строке
+хранится ближайшая такая дата, а строки с наступившей датой пересчитывает
+rebuild_stats --due по расписанию. Чтение ничего не пишет: отсутствующую
+строку оно вычисляет без сохранения.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import (DEFERRED, Case, Count, DateTimeField, F, Max,
+                              Min, Q, Subquery, Value, When)
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .constants import LATEST_POSTS_PER_CATEGORY
+from .models import AuthorStats, Category, CategoryStats, Comment, Post
+from . import reference
+from .services import filter_published_posts, published_posts_q
+
+# Пересчёт идёт и из представлений, читающих с реплики: отстающая реплика
+# не должна попасть в счётчики, а служебная запись — закрепить клиента
+# за основной базой.
+PRIMARY = DEFAULT_DB_ALIAS
+
+EMPTY_POST_FIELDS = {
+    'total_posts': 0, 'published_posts': 0,
+    'last_post_date': None, 'next_publication': None,
+}
+
+
+def post_fields(author_ids):
+    now = timezone.now()
+    rows = Post.objects.using(PRIMARY).filter(
+        author_id__in=author_ids
+    ).order_by().values('author_id').annotate(
+        total_posts=Count('pk'),
+        published_posts=Count('pk', filter=published_posts_q()),
+        last_post_date=Max('pub_date', filter=published_posts_q()),
+        next_publication=Min('pub_date', filter=Q(pub_date__gt=now)),
+    )
+    return {row.pop('author_id'): row for row in rows}
+
+
+def count_by(field, author_ids):
+    return dict(Comment.objects.using(PRIMARY).filter(
+        **{f'{field}__in': author_ids}
+    ).order_by().values(field).annotate(
+        count=Count('pk')
+    ).values_list(field, 'count'))
+
+
+def comment_counts(author_ids):
+    return (count_by('author_id', author_ids),
+            count_by('post__author_id', author_ids))
+
+
+def author_fields(author_ids):
+    """Поля строк авторов, посчитанные с нуля, по id."""
+    author_ids = set(author_ids)
+    fields = post_fields(author_ids)
+    written, received = comment_counts(author_ids)
+    result = {}
+    for author_id in author_ids:
+        result[author_id] = fields.get(author_id, dict(EMPTY_POST_FIELDS))
+        result[author_id]['comments_written'] = written.get(author_id, 0)
+        result[author_id]['comments_received'] = received.get(author_id, 0)
+    return result
+
+
+def build_authors(author_ids):
+    """Пересчитывает строки авторов с нуля и возвращает их по id."""
+    return {
+        author_id: AuthorStats.objects.using(PRIMARY).update_or_create(
+            author_id=author_id, defaults=defaults)[0]
+        for author_id, defaults in author_fields(author_ids).items()
+    }
+
+
+def refresh_authors(author_ids):
+    """Пересчитывает поля публикаций у существующих строк.
+
+    Новые строки не создаются: отсутствующую строку целиком построит
+    author_stats() при первом чтении.
+    """
+    author_ids = set(author_ids)
+    if not author_ids:
+        return
+    fields = post_fields(author_ids)
+    for author_id in author_ids:
+        AuthorStats.objects.using(PRIMARY).filter(author_id=author_id).update(
+            **fields.get(author_id, EMPTY_POST_FIELDS))
+
+
+def author_stats(author):
+    """Строка статистики автора; отсутствующая вычисляется без сохранения."""
+    stats = AuthorStats.objects.filter(author=author).first()
+    if stats is None:
+        # author_id, а не author: присваивание связи спросило бы у
+        # роутера базу для записи и закрепило бы читателя за основной.
+        return AuthorStats(
+            author_id=author.pk, **author_fields([author.pk])[author.pk])
+    return stats
+
+
+def latest_posts(category_id):
+    return list(filter_published_posts(
+        Post.objects.using(PRIMARY).filter(category_id=category_id)
+    ).order_by('-pub_date', '-pk').values_list(
+        'pk', flat=True)[:LATEST_POSTS_PER_CATEGORY])
+
+
+def category_fields(category_ids):
+    """Поля сводок категорий, посчитанные с нуля, по id."""
+    category_ids = set(category_ids)
+    if not category_ids:
+        return {}
+    now = timezone.now()
+    fields = {
+        row.pop('category_id'): row
+        for row in Post.objects.using(PRIMARY).filter(
+            category_id__in=category_ids
+        ).order_by().values('category_id').annotate(
+            published_posts=Count('pk', filter=published_posts_q()),
+            next_publication=Min('pub_date', filter=Q(
+                pub_date__gt=now, is_published=True)),
+        )
+    }
+    result = {}
+    for category_id in category_ids:
+        result[category_id] = fields.get(
+            category_id, {'published_posts': 0, 'next_publication': None})
+        result[category_id]['latest_posts'] = latest_posts(category_id)
+    return result
+
+
+def refresh_categories(category_ids):
+    """Пересчитывает сводки категорий и возвращает их по id."""
+    return {
+        category_id: CategoryStats.objects.using(PRIMARY).update_or_create(
+            category_id=category_id, defaults=defaults)[0]
+        for category_id, defaults in category_fields(category_ids).items()
+    }
+
+
+def category_stats(category):
+    """Сводка категории; отсутствующая вычисляется без сохранения."""
+    stats = CategoryStats.objects.filter(category=category).first()
+    if stats is None:
+        return CategoryStats(
+            category_id=category.pk,
+            **category_fields([category.pk])[category.pk])
+    return stats
+
+
+def category_directory():
+    """Опубликованные категории со сводками и последними публикациями.
+
+    Обходится двумя запросами, сколько бы ни было категорий и публикаций;
+    отсутствующие сводки вычисляются без сохранения.
+    """
+    categories = list(Category.objects.filter(
+        is_published=True).select_related('stats').order_by('title'))
+    missing = category_fields(
+        category.pk for category in categories
+        if not hasattr(category, 'stats'))
+    for category in categories:
+        if category.pk in missing:
+            # Прямо в кэш связи: присваивание category.stats спросило бы у
+            # роутера базу для записи и закрепило бы читателя за основной.
+            Category.stats.related.set_cached_value(category, CategoryStats(
+                category_id=category.pk, **missing[category.pk]))
+    posts = filter_published_posts(Post.objects.filter(pk__in=[
+        pk for category in categories
+        for pk in category.stats.latest_posts
+    ])).select_related('author').in_bulk()
+    for category in categories:
+        category.latest_posts = [
+            posts[pk] for pk in category.stats.latest_posts if pk in posts]
+    return categories
+
+
+def roll_over():
+    """Пересчитывает строки, у которых наступила отложенная публикация."""
+    now = timezone.now()
+    author_ids = list(AuthorStats.objects.using(PRIMARY).filter(
+        next_publication__lte=now).values_list('author_id', flat=True))
+    build_authors(author_ids)
+    category_ids = list(CategoryStats.objects.using(PRIMARY).filter(
+        next_publication__lte=now).values_list('category_id', flat=True))
+    refresh_categories(category_ids)
+    return len(author_ids), len(category_ids)
+
+
+def rebuild(batch_size=500):
+    """Пересчитывает статистику авторов, у которых есть записи, и категорий."""
+    author_ids = sorted(
+        set(Post._base_manager.values_list('author_id', flat=True))
+        | set(Comment._base_manager.values_list('author_id', flat=True)))
+    AuthorStats.objects.exclude(author_id__in=author_ids).delete()
+    for start in range(0, len(author_ids), batch_size):
+        build_authors(author_ids[start:start + batch_size])
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    for start in range(0, len(category_ids), batch_size):
+        refresh_categories(category_ids[start:start + batch_size])
+    return len(author_ids), len(category_ids)
+
+
+def shift_comment_counters(comment, delta):
+    for author_id, field in ((comment.author_id, 'comments_written'),
+                             (comment.post.author_id, 'comments_received')):
+        if not AuthorStats.objects.using(PRIMARY).filter(
+                author_id=author_id).update(**{field: F(field) + delta}):
+            build_authors([author_id])
+
+
+TRACKED_FIELDS = (
+    'author_id', 'category_id', 'is_published', 'pub_date', 'is_deleted')
+
+
+def tracked(post):
+    return {name: getattr(post, name) for name in TRACKED_FIELDS}
+
+
+def stored(post):
+    """Поля публикации, как они лежат в базе; None у новой публикации."""
+    if post._state.adding:
+        return None
+    loaded = getattr(post, '_loaded', {})
+    if all(loaded.get(name, DEFERRED) is not DEFERRED
+           for name in TRACKED_FIELDS):
+        return {name: loaded[name] for name in TRACKED_FIELDS}
+    return Post._base_manager.using(PRIMARY).filter(
+        pk=post.pk).values(*TRACKED_FIELDS).first()
+
+
+def visible(state):
+    return state is not None and not state['is_deleted']
+
+
+def listed(state):
+    """Публикация видна читателям, если её дата уже наступила."""
+    if not visible(state) or not state['is_published']:
+        return False
+    category = reference.categories.get(state['category_id'])
+    return category is not None and category.is_published
+
+
+def live(state, now):
+    return listed(state) and state['pub_date'] <= now
+
+
+def pending(state, now):
+    return listed(state) and state['pub_date'] > now
+
+
+def later(field, date):
+    date = Value(date, output_field=DateTimeField())
+    return Greatest(Coalesce(field, date), date)
+
+
+def earlier(field, date):
+    date = Value(date, output_field=DateTimeField())
+    return Least(Coalesce(field, date), date)
+
+
+def last_post_date(author_id):
+    return Subquery(filter_published_posts(
+        Post.objects.using(PRIMARY).filter(author_id=author_id)
+    ).order_by('-pub_date').values('pub_date')[:1])
+
+
+def shift_author(author_id, old, new, now):
+    """Сдвигает строку автора на разницу между old и new."""
+    if not visible(old) or old['author_id'] != author_id:
+        old = None
+    if not visible(new) or new['author_id'] != author_id:
+        new = None
+    was_live, is_live = live(old, now), live(new, now)
+    fields = {}
+    if (old is None) != (new is None):
+        fields['total_posts'] = F('total_posts') + (-1 if new is None else 1)
+    if was_live != is_live:
+        fields['published_posts'] = (
+            F('published_posts') + (1 if is_live else -1))
+    if was_live and not (is_live and new['pub_date'] >= old['pub_date']):
+        # Ушла, возможно, самая свежая публикация: найдём следующую.
+        fields['last_post_date'] = Case(
+            When(last_post_date=old['pub_date'],
+                 then=last_post_date(author_id)),
+            default=F('last_post_date'))
+    elif is_live and (not was_live or new['pub_date'] != old['pub_date']):
+        fields['last_post_date'] = later('last_post_date', new['pub_date'])
+    if pending(new, now) and not (
+            pending(old, now) and old['pub_date'] == new['pub_date']):
+        fields['next_publication'] = earlier(
+            'next_publication', new['pub_date'])
+    if fields and not AuthorStats.objects.using(PRIMARY).filter(
+            author_id=author_id).update(**fields):
+        build_authors([author_id])
+
+
+def shifted_latest(stats, pk, old, new):
+    """Последние публикации категории после того, как old стала new."""
+    if pk in stats.latest_posts and not (
+            old and new and new['pub_date'] >= old['pub_date']):
+        return latest_posts(stats.category_id)
+    if new is None:
+        return stats.latest_posts
+    dates = dict(Post.objects.using(PRIMARY).filter(
+        pk__in=[*stats.latest_posts, pk]).values_list('pk', 'pub_date'))
+    return sorted(dates, key=lambda key: (dates[key], key),
+                  reverse=True)[:LATEST_POSTS_PER_CATEGORY]
+
+
+def shift_category(category_id, pk, old, new, now):
+    """Сдвигает сводку категории на разницу между old и new.
+
+    Список последних публикаций пересобирается запросом по категории,
+    только когда из него уходит публикация; иначе сортируются даты
+    не более LATEST_POSTS_PER_CATEGORY + 1 публикаций.
+    """
+    if not listed(old) or old['category_id'] != category_id:
+        old = None
+    if not listed(new) or new['category_id'] != category_id:
+        new = None
+    was_live, is_live = live(old, now), live(new, now)
+    if not (was_live or is_live or pending(new, now)):
+        return
+    stats = CategoryStats.objects.using(PRIMARY).filter(
+        category_id=category_id).first()
+    if stats is None:
+        refresh_categories([category_id])
+        return
+    fields = {}
+    if was_live != is_live:
+        fields['published_posts'] = (
+            F('published_posts') + (1 if is_live else -1))
+    if pending(new, now) and not (
+            pending(old, now) and old['pub_date'] == new['pub_date']):
+        fields['next_publication'] = earlier(
+            'next_publication', new['pub_date'])
+    latest = shifted_latest(stats, pk, old if was_live else None,
+                            new if is_live else None)
+    if latest != stats.latest_posts:
+        fields['latest_posts'] = latest
+    if fields:
+        CategoryStats.objects.using(PRIMARY).filter(
+            category_id=category_id).update(**fields)
+
+
+def shift_post(pk, old, new):
+    if old == new:
+        return
+    now = timezone.now()
+    for author_id in {state['author_id'] for state in (old, new)
+                      if visible(state)}:
+        shift_author(author_id, old, new, now)
+    for category_id in {state['category_id'] for state in (old, new)
+                        if listed(state)}:
+        shift_category(category_id, pk, old, new, now)
+
+
+def post_saving(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._stats_stored = stored(instance)
+
+
+def post_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._loaded = tracked(instance)
+        shift_post(instance.pk, instance._stats_stored, instance._loaded)
+
+
+def post_deleted(sender, instance, **kwargs):
+    # Скрытая публикация уже вычтена в hide(), при очистке её не учитываем.
+    if not instance.is_deleted:
+        shift_post(instance.pk, tracked(instance), None)
+
+
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_comment_counters(instance, 1)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    if not instance.is_deleted:
+        shift_comment_counters(instance, -1)
+
+
+def category_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_categories([instance.pk])
+        refresh_authors(set(Post.objects.filter(category=instance).values_list(
+            'author_id', flat=True)))
+
+
+def category_deleting(sender, instance, **kwargs):
+    # После удаления category_id у публикаций уже обнулён.
+    instance._stats_author_ids = set(Post.objects.filter(
+        category=instance).values_list('author_id', flat=True))
+
+
+def category_deleted(sender, instance, **kwargs):
+    refresh_authors(getattr(instance, '_stats_author_ids', ()))
@@ -1,20 +1,34 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'blog'
 
 urlpatterns = [
     path('',
          views.index, name='index'),
+    path('feed/',
+         feeds.rss, name='feed'),
+    path('feed/atom/',
+         feeds.atom, name='feed_atom'),
     path('posts/<int:post_id>/',
          views.post_detail, name='post_detail'),
+    path('category/',
+         views.category_index, name='category_index'),
     path('category/<slug:category_slug>/',
          views.category_posts, name='category_posts'),
+    path('category/<slug:category_slug>/feed/',
+         feeds.rss, name='category_feed'),
+    path('category/<slug:category_slug>/feed/atom/',
+         feeds.atom, name='category_feed_atom'),
     path('profile/edit/',
          views.edit_profile, name='edit_profile'),
     path('profile/<str:username>/',
          views.profile, name='profile'),
+    path('profile/<str:username>/feed/',
+         feeds.rss, name='profile_feed'),
+    path('profile/<str:username>/feed/atom/',
+         feeds.atom, name='profile_feed_atom'),
     path('posts/create/',
          views.create_post, name='create_post'),
     path('posts/<int:post_id>/edit/',
@@ -2,17 +2,29 @@ from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
+from django.http import Http404, HttpResponseForbidden
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
-from .models import Category, Post, Comment
+from core.routers import replica_reads
+from core.throttling import rate_limited
+from core.writes import commit_files, write
+
+from .deletion import schedule_deletion, scheduled
+from .models import Post, Comment
+from .reference import published_category
+from .stats import author_stats, category_directory, category_stats
 from .forms import PostForm, CommentForm
 from .services import (paginate_queryset,
                        filter_published_posts,
-                       annotate_and_select_related)
+                       annotate_and_select_related,
+                       fragment_format,
+                       comment_fragment,
+                       form_errors_fragment)
 from .constants import POSTS_PER_PAGE
 
 
+@replica_reads
 def index(request):
     posts = annotate_and_select_related(
         filter_published_posts(Post.objects.all()))
@@ -22,12 +34,13 @@ def index(request):
     return render(request, 'blog/index.html', {'page_obj': page_obj})
 
 
+@replica_reads
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    posts = Post.objects.select_related('author', 'location', 'category')
+    post = get_object_or_404(posts, id=post_id)
 
     if post.author != request.user:
-        post = get_object_or_404(
-            filter_published_posts(Post.objects.all()), id=post_id)
+        post = get_object_or_404(filter_published_posts(posts), id=post_id)
 
     comments = post.comments.select_related('author').all()
 
@@ -40,16 +53,26 @@ def post_detail(request, post_id):
     })
 
 
+@replica_reads
+def category_index(request):
+    return render(request, 'blog/categories.html', {
+        'categories': category_directory(),
+    })
+
+
+@replica_reads
 def category_posts(request, category_slug):
-    category = get_object_or_404(Category,
-                                 slug=category_slug,
-                                 is_published=True)
+    category = published_category(category_slug)
+    if category is None:
+        raise Http404('Категория не найдена.')
     posts = filter_published_posts(
         annotate_and_select_related(
             category.posts.all())
     )
 
-    page_obj = paginate_queryset(posts, request, POSTS_PER_PAGE)
+    page_obj = paginate_queryset(
+        posts, request, POSTS_PER_PAGE,
+        count=category_stats(category).published_posts)
 
     return render(request, 'blog/category.html', {
         'category': category,
@@ -57,32 +80,43 @@ def category_posts(request, category_slug):
     })
 
 
+@replica_reads
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.exclude(pk__in=scheduled(User)), username=username)
     posts = annotate_and_select_related(author.posts)
 
+    stats = author_stats(author)
+    count = stats.total_posts
+
     if request.user != author:
         posts = filter_published_posts(posts)
+        count = stats.published_posts
 
-    page_obj = paginate_queryset(posts, request, POSTS_PER_PAGE)
+    page_obj = paginate_queryset(posts, request, POSTS_PER_PAGE, count=count)
 
     return render(request, 'blog/profile.html', {
         'profile': author,
+        'stats': stats,
         'page_obj': page_obj,
     })
 
 
 @login_required
 def edit_profile(request):
-    form = UserChangeForm(request.POST or None, instance=request.user)
+    # request.user может быть копией из кэша, а форма сохраняет все поля:
+    # устаревшая копия откатила бы пароль или is_active.
+    user = get_object_or_404(User, pk=request.user.pk)
+    form = UserChangeForm(request.POST or None, instance=user)
 
     if form.is_valid():
         form.save()
-        return redirect('blog:profile', username=request.user.username)
+        return redirect('blog:profile', username=user.username)
 
     return render(request, 'blog/user.html', {'form': form})
 
 
+@rate_limited('post')
 @login_required
 def create_post(request):
     form = PostForm(request.POST or None, request.FILES or None)
@@ -90,17 +124,19 @@ def create_post(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        commit_files(post)
+        write(post.save)
         return redirect('blog:profile', username=request.user.username)
 
     return render(request, 'blog/create.html', {'form': form})
 
 
+@rate_limited('post')
 @login_required
 def edit_post(request, post_id):
     post = get_object_or_404(Post, id=post_id)
 
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         return redirect('blog:post_detail', post_id=post.id)
 
     form = PostForm(request.POST or None, request.FILES or None, instance=post)
@@ -112,25 +148,27 @@ def edit_post(request, post_id):
     return render(request, 'blog/create.html', {'form': form, 'is_edit': True})
 
 
+@rate_limited('post')
 @login_required
 def delete_post(request, post_id):
     post = get_object_or_404(Post, id=post_id)
 
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         return redirect('blog:post_detail', post_id=post.id)
 
     if request.method == 'POST':
-        post.delete()
+        schedule_deletion(post)
         return redirect('blog:index')
 
     return render(request, 'blog/create.html', {'post': post})
 
 
+@rate_limited('comment')
 @login_required
 def delete_comment(request, post_id, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
 
-    if comment.author != request.user:
+    if comment.author_id != request.user.id:
         return redirect('blog:post_detail', post_id=post_id)
 
     if request.method == 'POST':
@@ -143,6 +181,7 @@ def delete_comment(request, post_id, comment_id):
     })
 
 
+@rate_limited('comment')
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -152,24 +191,37 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
-        comment.save()
+        write(comment.save)
+        if fragment_format(request):
+            return comment_fragment(request, comment, status=201)
         return redirect('blog:post_detail', post_id=post_id)
 
+    if request.method == 'POST' and fragment_format(request):
+        return form_errors_fragment(request, form)
+
     return render(request, 'blog/detail.html', {'post': post, 'form': form})
 
 
+@rate_limited('comment')
 @login_required
 def edit_comment(request, post_id, comment_id):
     comment = get_object_or_404(Comment, id=comment_id, post_id=post_id)
 
-    if comment.author != request.user:
+    if comment.author_id != request.user.id:
+        if fragment_format(request):
+            return HttpResponseForbidden()
         return redirect('blog:post_detail', post_id=post_id)
 
     form = CommentForm(request.POST or None, instance=comment)
     if form.is_valid():
         form.save()
+        if fragment_format(request):
+            return comment_fragment(request, comment)
         return redirect('blog:post_detail', post_id=post_id)
 
+    if request.method == 'POST' and fragment_format(request):
+        return form_errors_fragment(request, form)
+
     return render(request, 'blog/comment.html', {
         'form': form,
         'comment': comment,
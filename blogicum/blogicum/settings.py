@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 
@@ -19,6 +20,8 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
+    'monitoring.apps.MonitoringConfig',
+    'core.apps.CoreConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -30,25 +33,40 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.TracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.SamplingProfilerMiddleware',
+    'core.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.throttling.RateLimitMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.auth.CachedAuthenticationMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
+    'monitoring.middleware.MemoryProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.middleware.ViewTracingMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / "templates"
 
+TEMPLATE_LOADERS = [
+    'monitoring.loaders.FilesystemLoader',
+    'monitoring.loaders.AppDirectoriesLoader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('monitoring.loaders.CachedLoader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -64,11 +82,59 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+DATABASE_REPLICA_FILES = [
+    path for path in os.environ.get('DATABASE_REPLICA_FILES', '').split(',')
+    if path
+]
+
+DATABASES.update({
+    f'replica{index}': {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    for index, path in enumerate(DATABASE_REPLICA_FILES, 1)
+})
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = 10
+
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
+WRITE_QUEUE = False
+
+WRITE_QUEUE_BATCH = 50
+
+WRITE_QUEUE_LINGER = 0.002
+
+WRITE_QUEUE_TIMEOUT = 30
+
+WRITE_QUEUE_LOCK = BASE_DIR / 'run' / 'write.lock'
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'monitoring.cache.LocMemCache',
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,3 +184,143 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 LOGIN_URL = 'blog:index'
+
+SESSION_ENGINE = 'core.sessions'
+
+SESSION_CACHE_TIMEOUT = 60
+
+SESSION_CLEANUP_BATCH = 1000
+
+USER_CACHE_TIMEOUT = 60
+
+REFERENCE_CACHE_TIMEOUT = 60
+
+FEED_ITEMS = 20
+
+FEED_CACHE_TIMEOUT = 300
+
+FEED_MAX_AGE = 60
+
+DELETION_TASK_LEASE = 300
+
+RATE_LIMITS = {
+    'comment': {'user': (20, 60), 'ip': (60, 60)},
+    'post': {'user': (10, 60), 'ip': (30, 60)},
+}
+
+RATE_LIMIT_IP_META = 'REMOTE_ADDR'
+
+AUTH_THROTTLES = {
+    'login': {'user': (5, 300), 'ip': (20, 300)},
+    'registration': {'user': (3, 3600), 'ip': (10, 3600)},
+}
+
+PASSWORD_HASHERS = [
+    'core.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+PASSWORD_HASHING_POOL_SIZE = 0
+
+PASSWORD_HASHING_MAX_PENDING = 16
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+MONITORING_TOKEN_MAX_AGE = 60 * 60
+
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+PROFILING_KEEP = 50
+
+MEMORY_PROFILING_DIR = PROFILING_DIR / 'memory'
+
+TRACEMALLOC_FRAMES = 10
+
+MEMORY_DUMP_SIGNAL = None
+
+SAMPLING_PROFILER = False
+
+SAMPLING_PROFILER_INTERVAL = 0.01
+
+SAMPLING_PROFILER_FLUSH_INTERVAL = 60
+
+SAMPLING_PROFILER_DIR = PROFILING_DIR / 'samples'
+
+SAMPLING_PROFILER_KEEP = 100
+
+METRICS_DIR = None
+
+METRICS_FLUSH_INTERVAL = 5
+
+METRICS_TOKEN = ''
+
+TRACING_SAMPLE_RATE = 0.0
+
+TRACING_SERVICE_NAME = 'blogicum'
+
+SLOW_QUERY_LOG = True
+
+SLOW_QUERY_THRESHOLD_MS = 100
+
+LOGS_DIR = BASE_DIR / 'logs'
+
+WARMUP = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+        'access': {
+            'class': 'monitoring.logging.BackgroundRotatingFileHandler',
+            'filename': LOGS_DIR / 'access.jsonl',
+            'maxBytes': 50 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+        },
+        'slow_queries': {
+            'class': 'monitoring.logging.BackgroundRotatingFileHandler',
+            'filename': LOGS_DIR / 'slow_queries.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+        },
+        'traces': {
+            'class': 'monitoring.logging.BackgroundRotatingFileHandler',
+            'filename': LOGS_DIR / 'traces.jsonl',
+            'maxBytes': 50 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'monitoring.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'monitoring.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'monitoring.traces': {
+            'handlers': ['traces'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
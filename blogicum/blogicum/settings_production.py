@@ -0,0 +1,49 @@
+"""Профиль для боевых воркеров: без dev-приложений и с прогревом.
+
+DJANGO_SETTINGS_MODULE=blogicum.settings_production
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import (BASE_DIR, DATABASES, INSTALLED_APPS, TEMPLATE_LOADERS,
+                       TEMPLATES)
+
+DEV_APPS = ('django_extensions',)
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_APPS]
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [('monitoring.loaders.CachedLoader', TEMPLATE_LOADERS)],
+    },
+}]
+
+DATABASES = {
+    alias: {**params, 'CONN_MAX_AGE': 60}
+    for alias, params in DATABASES.items()
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'monitoring.cache.FileBasedCache',
+        'LOCATION': BASE_DIR / 'run' / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+METRICS_DIR = BASE_DIR / 'metrics'
+
+WARMUP = True
+
+WRITE_QUEUE = True
+
+PASSWORD_HASHING_POOL_SIZE = 1
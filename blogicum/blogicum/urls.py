@@ -13,6 +13,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('blog.urls', namespace='blog')),
     path('pages/', include('pages.urls', namespace='pages')),
+    path('monitoring/', include('monitoring.urls', namespace='monitoring')),
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/registration/', UserRegistrationView.as_view(),
          name='registration'),
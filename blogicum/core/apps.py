@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    verbose_name = 'Инфраструктура'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.signals import user_logged_out
+        from django.db.models.signals import post_delete, post_save
+
+        from . import auth, checks  # noqa: F401
+
+        user_model = get_user_model()
+        post_save.connect(auth.user_changed, sender=user_model)
+        post_delete.connect(auth.user_changed, sender=user_model)
+        user_logged_out.connect(auth.user_logged_out)
@@ -0,0 +1,79 @@
+"""Пользователь запроса из кэша вместо запроса к auth_user.
+
+Запись кэша хранит значения полей пользователя и адресуется id
+пользователя, его версией и хэшем аутентификации из сессии. Сессия с
+чужим или устаревшим хэшем (пароль сменили) не находит запись и проходит
+полную проверку django.contrib.auth.get_user. Сохранение и удаление
+пользователя и выход из системы увеличивают версию и этим сбрасывают все
+его записи. Версия видна всем воркерам, только если кэш по умолчанию у
+них общий; manage.py check --deploy требует этого (core.E001).
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+VERSION_KEY = 'core.auth.version:{}'
+USER_KEY = 'core.auth.user:{}:{}:{}'
+
+
+def _fields(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _version(user_id):
+    return cache.get(VERSION_KEY.format(user_id), 0)
+
+
+def invalidate_user(user_id):
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def resolve_user(request):
+    session = request.session
+    try:
+        user_id = session[auth.SESSION_KEY]
+        backend = session[auth.BACKEND_SESSION_KEY]
+        session_hash = session[auth.HASH_SESSION_KEY]
+    except KeyError:
+        return auth.get_user(request)
+    if backend not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+    model = auth.get_user_model()
+    key = USER_KEY.format(user_id, _version(user_id), session_hash)
+    values = cache.get(key)
+    if values is not None:
+        return model.from_db('default', _fields(model), values)
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(
+            key, [getattr(user, name) for name in _fields(model)],
+            settings.USER_CACHE_TIMEOUT,
+        )
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = resolve_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+def user_logged_out(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,25 @@
+"""SQLite с прагмами из настроек.
+
+Прагмы SQLITE_PRAGMAS применяются к каждому новому соединению (WAL,
+synchronous, mmap, кэш страниц, busy_timeout, temp_store). Транзакции
+atomic() открываются с SQLITE_TRANSACTION_MODE: при IMMEDIATE блокировка
+записи берётся сразу, и busy_timeout ждёт её вместо ошибки «database is
+locked» при повышении читающей транзакции до пишущей.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def pragmas(self):
+        return self.settings_dict.get('PRAGMAS', settings.SQLITE_PRAGMAS)
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas().items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = settings.SQLITE_TRANSACTION_MODE
+        self.cursor().execute(f'BEGIN {mode}'.strip())
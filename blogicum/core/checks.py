@@ -0,0 +1,40 @@
+"""Проверки настроек для manage.py check --deploy."""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+PROCESS_CACHES = (DummyCache, LocMemCache)
+
+
+def shared_cache_users():
+    """Компоненты, которые сбрасывают записи через кэш, и их кэши."""
+    users = []
+    if 'core.auth.CachedAuthenticationMiddleware' in settings.MIDDLEWARE:
+        users.append(('core.auth.CachedAuthenticationMiddleware', 'default'))
+    if settings.SESSION_ENGINE == 'core.sessions':
+        users.append(('core.sessions', settings.SESSION_CACHE_ALIAS))
+    return users
+
+
+def per_process_cache(user, alias, id):
+    """Ошибка, если user сбрасывает записи через кэш одного процесса."""
+    if not isinstance(caches[alias], PROCESS_CACHES):
+        return []
+    return [Error(
+        f'{user} сбрасывает записи через кэш «{alias}», а он у каждого '
+        'процесса свой: остальные воркеры увидят изменение с опозданием.',
+        hint=f'Укажите в CACHES["{alias}"] кэш, общий для воркеров '
+             '(monitoring.cache.FileBasedCache, Memcached).',
+        id=id,
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    return [
+        error
+        for user, alias in shared_cache_users()
+        for error in per_process_cache(user, alias, 'core.E001')
+    ]
@@ -0,0 +1,60 @@
+"""PBKDF2 в ограниченном пуле процессов.
+
+При PASSWORD_HASHING_POOL_SIZE > 0 хэширование уходит в пул из стольких
+процессов, а число ожидающих заданий ограничено
+PASSWORD_HASHING_MAX_PENDING: всплеск входов занимает не больше ядер, чем
+размер пула, и не вытесняет обработку остальных запросов. Имя алгоритма
+прежнее, pbkdf2_sha256, так что существующие хэши проверяются как раньше.
+"""
+import base64
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.crypto import pbkdf2
+
+
+class HashingPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._slots = None
+
+    def _ensure_started(self):
+        """Пул создаётся лениво в каждом процессе, в том числе после fork."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_POOL_SIZE,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            self._slots = threading.BoundedSemaphore(
+                settings.PASSWORD_HASHING_MAX_PENDING)
+            self._pid = os.getpid()
+
+    def run(self, function, *args):
+        self._ensure_started()
+        with self._slots:
+            return self._executor.submit(function, *args).result()
+
+
+pool = HashingPool()
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    def encode(self, password, salt, iterations=None):
+        if not settings.PASSWORD_HASHING_POOL_SIZE:
+            return super().encode(password, salt, iterations)
+        assert password is not None
+        assert salt and '$' not in salt
+        iterations = iterations or self.iterations
+        hash = pool.run(pbkdf2, password, salt, iterations, 0, self.digest)
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
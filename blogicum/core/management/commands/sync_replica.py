@@ -0,0 +1,55 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из DATABASE_REPLICAS '
+        'через online backup API. С --interval работает как постоянный '
+        'процесс репликации для локальной проверки роутера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование каждые N секунд.'
+        )
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        replicas = [
+            connections[alias].settings_dict
+            for alias in settings.DATABASE_REPLICAS
+        ]
+        if not replicas:
+            raise CommandError('DATABASE_REPLICAS пуст.')
+        if any(
+            params['ENGINE'].split('.')[-1] != 'sqlite3'
+            for params in (primary, *replicas)
+        ):
+            raise CommandError('Копировщик работает только с SQLite.')
+        while True:
+            started = time.perf_counter()
+            for params in replicas:
+                self.copy(primary['NAME'], params['NAME'])
+            self.stdout.write(
+                f'Скопировано в {len(replicas)} реплик за '
+                f'{(time.perf_counter() - started) * 1000:.1f} мс.'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source, target):
+        source = sqlite3.connect(source)
+        target = sqlite3.connect(target)
+        try:
+            with target:
+                source.backup(target, pages=1024)
+        finally:
+            source.close()
+            target.close()
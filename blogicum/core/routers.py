@@ -0,0 +1,95 @@
+"""Чтение с реплик для представлений, помеченных replica_reads.
+
+Реплики перечислены в DATABASE_REPLICAS. Запись и все чтения вне
+помеченных представлений идут в default. Если запрос что-то записал,
+браузер закрепляется за default на REPLICA_PIN_SECONDS (подписанная
+cookie), чтобы пользователь сразу видел свои изменения, пока реплика
+догоняет основную базу.
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+PIN_COOKIE = 'db_pin'
+PIN_SALT = 'core.routers.pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Сессия и пользователь запроса загружаются лениво, уже внутри
+# представления: устаревшая реплика разлогинила бы свежую сессию.
+PRIMARY_APPS = {'auth', 'contenttypes', 'sessions'}
+
+_state = ContextVar('replica_state', default=None)
+
+
+def is_pinned(request):
+    return request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS,
+    ) is not None
+
+
+def replica_reads(view):
+    """Помечает представление, которое только читает данные."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if (
+            state is None or not settings.DATABASE_REPLICAS
+            or request.method not in SAFE_METHODS or is_pinned(request)
+        ):
+            return view(request, *args, **kwargs)
+        state['replica'] = True
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            return response
+        finally:
+            state['replica'] = False
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state and state['replica'] and not state['wrote']
+            and model._meta.app_label not in PRIMARY_APPS
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinMiddleware:
+    """Открывает состояние маршрутизации и закрепляет писавших за default."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'replica': False, 'wrote': False}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state['wrote'] and settings.DATABASE_REPLICAS:
+            response.set_signed_cookie(
+                PIN_COOKIE, '1', salt=PIN_SALT,
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite='Lax',
+            )
+        return response
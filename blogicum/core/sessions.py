@@ -0,0 +1,56 @@
+"""Сессии в БД с кэшем для чтения.
+
+Отличия от django.contrib.sessions.backends.cached_db:
+
+* копия в кэше живёт не дольше SESSION_CACHE_TIMEOUT. Выход из системы
+  удаляет копию, и остальные воркеры видят это, только если кэш у них
+  общий; manage.py check --deploy требует этого (core.E001);
+* просроченные строки удаляются пачками по SESSION_CLEANUP_BATCH
+  (manage.py clearsessions), чтобы не держать блокировку записи SQLite.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.db import transaction
+from django.utils import timezone
+
+
+class SessionStore(cached_db.SessionStore):
+    def cache_timeout(self, expiry=None):
+        return min(
+            self.get_expiry_age(expiry=expiry),
+            settings.SESSION_CACHE_TIMEOUT,
+        )
+
+    def load(self):
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            data = None
+        if data is not None:
+            return data
+        session = self._get_session_from_db()
+        if session is None:
+            return {}
+        data = self.decode(session.session_data)
+        self._cache.set(
+            self.cache_key, data, self.cache_timeout(session.expire_date))
+        return data
+
+    def save(self, must_create=False):
+        super(cached_db.SessionStore, self).save(must_create)
+        self._cache.set(self.cache_key, self._session, self.cache_timeout())
+
+    @classmethod
+    def clear_expired(cls):
+        model = cls.get_model_class()
+        deleted = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=timezone.now())
+                .order_by('expire_date')
+                .values_list('pk', flat=True)[:settings.SESSION_CLEANUP_BATCH]
+            )
+            if not keys:
+                return deleted
+            with transaction.atomic():
+                deleted += model.objects.filter(pk__in=keys).delete()[0]
@@ -0,0 +1,166 @@
+"""Ограничение частоты записи и попыток входа.
+
+Представления помечаются rate_limited(scope). RateLimitMiddleware стоит
+перед CsrfViewMiddleware и проверяет лимит в process_view, то есть до
+того, как CSRF-проверка разберёт тело запроса и загруженные файлы.
+Превышение лимита отвечает короткой 429 без шаблонов и запросов к БД.
+
+Вход и регистрация (имена маршрутов из AUTH_THROTTLES) ограничиваются
+скользящим окном по имени пользователя и IP до того, как форма вызовет
+хэширование пароля.
+
+Счётчики живут в памяти процесса, поэтому лимиты действуют на каждый
+воркер отдельно.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from math import ceil
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from monitoring.metrics import registry
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class TokenBuckets:
+    """Корзины с ёмкостью capacity, которые наполняются за period секунд."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, limits, now=None):
+        """Берёт по токену из каждой корзины или ни из одной.
+
+        limits: [(ключ, ёмкость, период)]. Возвращает 0, если запрос
+        пропущен, иначе число секунд до появления токена.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            levels = []
+            for key, capacity, period in limits:
+                tokens, updated = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated) * capacity
+                             / period)
+                levels.append(tokens)
+            wait = max(
+                (1 - tokens) * period / capacity
+                for tokens, (_, capacity, period) in zip(levels, limits)
+            )
+            if wait <= 0:
+                levels = [tokens - 1 for tokens in levels]
+            for tokens, (key, *_) in zip(levels, limits):
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return max(wait, 0)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SlidingWindows:
+    """Не больше limit событий за последние window секунд на ключ."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, limits, now=None):
+        """Засчитывает событие по всем ключам или ни по одному.
+
+        limits: [(ключ, лимит, окно)]. Возвращает 0, если событие
+        допустимо, иначе число секунд до освобождения места в окне.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            wait = 0
+            for key, limit, window in limits:
+                events = self._events.setdefault(key, deque())
+                while events and events[0] <= now - window:
+                    events.popleft()
+                if len(events) >= limit:
+                    wait = max(wait, events[-limit] + window - now)
+            for key, *_ in limits:
+                if not wait:
+                    self._events[key].append(now)
+                self._events.move_to_end(key)
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+
+buckets = TokenBuckets(max_keys=10000)
+windows = SlidingWindows(max_keys=10000)
+
+
+def client_ip(request):
+    value = request.META.get(settings.RATE_LIMIT_IP_META, '')
+    return value.split(',')[0].strip() or request.META.get('REMOTE_ADDR')
+
+
+def rate_limited(scope):
+    """Помечает пишущее представление областью лимитов из RATE_LIMITS."""
+    def decorator(view):
+        view.rate_limit_scope = scope
+        return view
+    return decorator
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.\n', status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(ceil(retry_after))
+    return response
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        if request.resolver_match.url_name in settings.AUTH_THROTTLES:
+            return self.throttle_auth(request)
+        scope = getattr(view_func, 'rate_limit_scope', None)
+        if scope is None:
+            return None
+        limits = settings.RATE_LIMITS[scope]
+        keys = [(f'{scope}:ip:{client_ip(request)}', *limits['ip'])]
+        if request.user.is_authenticated:
+            keys.append((f'{scope}:user:{request.user.pk}', *limits['user']))
+        retry_after = buckets.take(keys)
+        if not retry_after:
+            return None
+        registry.inc('blogicum_rate_limited_total', scope=scope)
+        return too_many_requests(retry_after)
+
+    def throttle_auth(self, request):
+        name = request.resolver_match.url_name
+        limits = settings.AUTH_THROTTLES[name]
+        keys = [(f'{name}:ip:{client_ip(request)}', *limits['ip'])]
+        username = request.POST.get('username', '').strip().lower()
+        if username:
+            keys.append((f'{name}:user:{username}', *limits['user']))
+        retry_after = windows.hit(keys)
+        if not retry_after:
+            return None
+        registry.inc('blogicum_auth_throttled_total', view=name)
+        return too_many_requests(retry_after)
@@ -0,0 +1,62 @@
+"""Прогрев воркера до первого запроса.
+
+Вызывается из wsgi.py после django.setup(). Ничего не открывает в БД,
+поэтому безопасен до fork (gunicorn --preload): воркеры наследуют уже
+скомпилированные шаблоны, маршруты и валидаторы.
+"""
+import logging
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.password_validation import (
+    get_default_password_validators)
+from django.template import engines
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger('core.warmup')
+
+
+def warm_urls(resolver=None):
+    """Компилирует регулярные выражения и заполняет обратные словари."""
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            count += warm_urls(pattern)
+        else:
+            count += 1
+    return count
+
+
+def template_names(engine):
+    for directory in engine.template_dirs:
+        directory = Path(directory)
+        for path in directory.rglob('*.html'):
+            yield path.relative_to(directory).as_posix()
+
+
+def warm_templates():
+    count = 0
+    for engine in engines.all():
+        for name in template_names(engine):
+            engine.get_template(name)
+            count += 1
+    return count
+
+
+def warmup():
+    started = perf_counter()
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+    urls = warm_urls()
+    templates = warm_templates()
+    validators = len(get_default_password_validators())
+    logger.info(
+        'warmup: %s urls, %s templates, %s validators in %.3fs',
+        urls, templates, validators, perf_counter() - started,
+    )
+    return {'urls': urls, 'templates': templates, 'validators': validators}
@@ -0,0 +1,154 @@
+"""Очередь записи в SQLite с групповой фиксацией.
+
+SQLite допускает одного писателя на файл. Вместо того чтобы воркеры
+соревновались за блокировку (и получали «database is locked»), запись
+отдаётся через write() фоновому потоку процесса. Поток собирает пачку
+заданий, берёт межпроцессную блокировку хоста (flock на WRITE_QUEUE_LOCK)
+и выполняет всю пачку в одной транзакции: каждое задание в своей точке
+сохранения, поэтому ошибка одного не откатывает остальные. Под нагрузкой
+растёт время ожидания в очереди, а не число ошибок.
+"""
+import contextvars
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.db import close_old_connections, models, transaction
+
+from monitoring.metrics import COUNT_BUCKETS, registry
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def host_lock():
+    """Блокировка, общая для всех воркеров на хосте."""
+    if fcntl is None:
+        yield
+        return
+    path = Path(settings.WRITE_QUEUE_LOCK)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class WriteQueue:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        """Запускает поток в текущем процессе, в том числе после fork."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            threading.Thread(
+                target=self._run, name='write-queue', daemon=True
+            ).start()
+
+    def submit(self, function, *args, **kwargs):
+        self.ensure_started()
+        future = Future()
+        context = contextvars.copy_context()
+        self._queue.put(
+            (future, context, function, args, kwargs, perf_counter()))
+        return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = perf_counter() + settings.WRITE_QUEUE_LINGER
+        while len(batch) < settings.WRITE_QUEUE_BATCH:
+            timeout = deadline - perf_counter()
+            try:
+                batch.append(
+                    self._queue.get(timeout=timeout) if timeout > 0
+                    else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            close_old_connections()
+            try:
+                self._commit(batch)
+            except Exception as error:
+                for future, *_ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _commit(self, batch):
+        started = perf_counter()
+        with host_lock():
+            locked = perf_counter()
+            registry.observe('blogicum_write_lock_wait_seconds',
+                             locked - started)
+            registry.observe('blogicum_write_batch_size', len(batch),
+                             buckets=COUNT_BUCKETS)
+            results = []
+            with transaction.atomic():
+                for future, context, function, args, kwargs, queued in batch:
+                    registry.observe('blogicum_write_queue_wait_seconds',
+                                     locked - queued)
+                    try:
+                        with transaction.atomic():
+                            result = context.run(function, *args, **kwargs)
+                    except Exception as error:
+                        results.append((future, None, error))
+                    else:
+                        results.append((future, result, None))
+        registry.observe('blogicum_write_commit_seconds',
+                         perf_counter() - locked)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+write_queue = WriteQueue()
+
+
+def commit_files(instance):
+    """Сохраняет загруженные файлы модели в хранилище в текущем потоке.
+
+    Иначе FileField.pre_save запишет их в потоке записи, пока тот держит
+    блокировку хоста и транзакцию пачки.
+    """
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            file = getattr(instance, field.attname)
+            if file and not file._committed:
+                file.save(file.name, file.file, save=False)
+
+
+def write(function, *args, **kwargs):
+    """Выполняет запись через очередь или сразу, если WRITE_QUEUE выключен.
+
+    Внутри atomic() соединение уже держит блокировку записи, и поток
+    очереди ждал бы её, пока не истечёт busy_timeout. Такая запись
+    выполняется сразу, в транзакции вызывающего кода.
+    """
+    if (not settings.WRITE_QUEUE
+            or transaction.get_connection().in_atomic_block):
+        with transaction.atomic():
+            return function(*args, **kwargs)
+    return write_queue.submit(function, *args, **kwargs)
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+    verbose_name = 'Мониторинг'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .memory import install_dump_signal
+        from .queries import install_query_log
+        from .tracing import install_query_tracing
+
+        connection_created.connect(install_query_log)
+        connection_created.connect(install_query_tracing)
+        install_dump_signal()
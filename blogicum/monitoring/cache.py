@@ -0,0 +1,33 @@
+from django.core.cache.backends.filebased import (
+    FileBasedCache as BaseFileBasedCache)
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+
+from .metrics import registry
+from .tracing import span
+
+_missing = object()
+
+
+class InstrumentedCache:
+    """Бэкенд кэша, который считает попадания и промахи."""
+
+    def get(self, key, default=None, version=None):
+        with span('cache.get') as cache_span:
+            value = super().get(key, _missing, version)
+        result = 'miss' if value is _missing else 'hit'
+        if cache_span is not None:
+            cache_span.attributes['cache.result'] = result
+        registry.inc('blogicum_cache_requests_total', result=result)
+        return default if value is _missing else value
+
+    def set(self, *args, **kwargs):
+        with span('cache.set'):
+            return super().set(*args, **kwargs)
+
+
+class LocMemCache(InstrumentedCache, BaseLocMemCache):
+    pass
+
+
+class FileBasedCache(InstrumentedCache, BaseFileBasedCache):
+    pass
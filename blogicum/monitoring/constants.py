@@ -0,0 +1,9 @@
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+PROFILE_SALT = 'monitoring.profile'
+PROFILE_TOP_FUNCTIONS = 40
+SERVER_TIMING_TEMPLATES = 20
+MEMORY_HEADER = 'HTTP_X_TRACEMALLOC'
+MEMORY_PARAM = '_tracemalloc'
+MEMORY_SALT = 'monitoring.tracemalloc'
+MEMORY_TOP_ALLOCATIONS = 30
@@ -0,0 +1,59 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any
+
+_current = ContextVar('request_stats', default=None)
+
+
+@dataclass
+class RequestStats:
+    """Счётчики одного запроса, которые заполняют БД, шаблоны и кэш."""
+
+    request: Any = None
+    queries: int = 0
+    db_time: float = 0.0
+    template_time: float = 0.0
+    template_stack: list = field(default_factory=list)
+    templates: dict = field(default_factory=dict)
+
+    def track_query(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - started
+
+    def enter_template(self):
+        self.template_stack.append(0.0)
+
+    def exit_template(self, name, elapsed):
+        """Учитывает рендеринг шаблона: полное и собственное время.
+
+        Собственное время не включает вложенные include и родителей extends.
+        """
+        children = self.template_stack.pop()
+        if self.template_stack:
+            self.template_stack[-1] += elapsed
+        else:
+            self.template_time += elapsed
+        row = self.templates.get(name)
+        if row is None:
+            row = self.templates[name] = [0, 0.0, 0.0]
+        row[0] += 1
+        row[1] += elapsed
+        row[2] += elapsed - children
+
+
+def current_stats():
+    return _current.get()
+
+
+def start_request(request):
+    stats = RequestStats(request)
+    return stats, _current.set(stats)
+
+
+def finish_request(token):
+    _current.reset(token)
@@ -0,0 +1,44 @@
+from time import perf_counter
+
+from django.template.base import Template
+from django.template.loaders import app_directories, cached, filesystem
+
+from .context import current_stats
+from .tracing import span
+
+
+class TimedTemplate(Template):
+    def _render(self, context):
+        stats = current_stats()
+        if stats is None:
+            return super()._render(context)
+        stats.enter_template()
+        started = perf_counter()
+        try:
+            with span('template.render',
+                      **{'template.name': self.origin.template_name}):
+                return super()._render(context)
+        finally:
+            stats.exit_template(
+                self.origin.template_name, perf_counter() - started)
+
+
+class TimedLoaderMixin:
+    """Загрузчик, отдающий TimedTemplate вместо Template."""
+
+    def get_template(self, *args, **kwargs):
+        template = super().get_template(*args, **kwargs)
+        template.__class__ = TimedTemplate
+        return template
+
+
+class FilesystemLoader(TimedLoaderMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(TimedLoaderMixin, app_directories.Loader):
+    pass
+
+
+class CachedLoader(TimedLoaderMixin, cached.Loader):
+    pass
@@ -0,0 +1,78 @@
+import atexit
+import os
+import queue
+from logging import handlers
+from pathlib import Path
+
+from .metrics import registry
+
+
+class RotatingFileHandler(handlers.RotatingFileHandler):
+    """RotatingFileHandler, который сам создаёт каталог для журнала."""
+
+    def __init__(self, filename, *args, **kwargs):
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(filename, *args, **kwargs)
+
+
+class _Listener(handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Очередь может быть заполнена: при остановке дождёмся места.
+        self.queue.put(self._sentinel)
+
+
+class BackgroundRotatingFileHandler(handlers.QueueHandler):
+    """Пишет журнал в фоновом потоке через ограниченную очередь.
+
+    Поток запроса только кладёт запись в очередь и никогда не ждёт диска:
+    если очередь заполнена, запись отбрасывается и учитывается в счётчике
+    `dropped` и метрике blogicum_log_records_dropped_total.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0,  # noqa: N803
+                 queue_size=10000, encoding='utf-8'):
+        self.queue_size = queue_size
+        super().__init__(queue.Queue(queue_size))
+        self.target = RotatingFileHandler(
+            filename, maxBytes=maxBytes, backupCount=backupCount,
+            encoding=encoding, delay=True,
+        )
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+
+    def _ensure_listener(self):
+        """Поток не переживает fork, поэтому в каждом воркере свой."""
+        if self._pid == os.getpid():
+            return
+        self.acquire()
+        try:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(self.queue_size)
+                self._listener = _Listener(self.queue, self.target)
+                self._listener.start()
+                self._pid = os.getpid()
+                atexit.register(self.flush_and_stop)
+        finally:
+            self.release()
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            registry.inc('blogicum_log_records_dropped_total',
+                         logger=record.name)
+
+    def flush_and_stop(self):
+        """Дописывает очередь и останавливает поток."""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+    def close(self):
+        self.flush_and_stop()
+        self.target.close()
+        super().close()
@@ -0,0 +1,208 @@
+import json
+import math
+import platform
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import urls as blog_urls
+from blog.models import Comment, Post
+from blog.services import filter_published_posts
+from pages import urls as pages_urls
+
+User = get_user_model()
+
+URLCONFS = (blog_urls, pages_urls)
+VIEWERS = ('anonymous', 'owner', 'other')
+COMMENT_ROUTES = ('delete_comment', 'edit_comment')
+
+
+def percentile(values, share):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержку, число запросов к БД и размер ответа для каждого '
+        'именованного маршрута blog и pages от имени анонима, владельца и '
+        'другого пользователя. Запускайте на заполненной базе (seed_blog).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--output', default='bench_results.json',
+            help='Куда сохранить результаты в формате JSON.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON с результатами прошлого прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый относительный рост p95.'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Рост p95 меньше этого значения не считается регрессией.'
+        )
+        parser.add_argument(
+            '--host', default='testserver',
+            help='Заголовок Host запросов; на время замера он разрешается '
+                 'в ALLOWED_HOSTS.'
+        )
+
+    def handle(self, *args, **options):
+        comment = Comment.objects.select_related(
+            'post__author', 'post__category', 'author'
+        ).filter(
+            post__in=filter_published_posts(Post.objects.all())
+        ).first()
+        if comment is None:
+            raise CommandError(
+                'В базе нет опубликованных постов с комментариями: '
+                'сначала выполните seed_blog.'
+            )
+        other = User.objects.exclude(
+            pk__in=(comment.author_id, comment.post.author_id)
+        ).first()
+        if other is None:
+            raise CommandError('Нужен хотя бы один сторонний пользователь.')
+
+        self.host = options['host']
+        with override_settings(
+                DEBUG=False,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, self.host]):
+            results = self.run(comment, other, options)
+
+        output = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'database': connection.vendor,
+            },
+            'results': results,
+        }
+        Path(options['output']).write_text(
+            json.dumps(output, indent=2, ensure_ascii=False))
+        self.report(results)
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+            regressions = self.compare(
+                results, baseline['results'], options['threshold'],
+                options['min_delta_ms'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
+
+    def routes(self, comment):
+        post = comment.post
+        values = {
+            'post_id': post.id,
+            'comment_id': comment.id,
+            'category_slug': post.category.slug,
+            'username': post.author.username,
+        }
+        for urlconf in URLCONFS:
+            for pattern in urlconf.urlpatterns:
+                name = f'{urlconf.app_name}:{pattern.name}'
+                params = pattern.pattern.converters.keys()
+                owner = (
+                    comment.author if pattern.name in COMMENT_ROUTES
+                    else post.author
+                )
+                yield name, reverse(
+                    name, kwargs={key: values[key] for key in params}
+                ), owner
+
+    def client(self, user=None):
+        client = Client(SERVER_NAME=self.host)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def run(self, comment, other, options):
+        anonymous = self.client()
+        clients = {other.pk: self.client(other)}
+        results = {}
+        for name, url, owner in self.routes(comment):
+            if owner.pk not in clients:
+                clients[owner.pk] = self.client(owner)
+            viewers = {
+                'anonymous': anonymous,
+                'owner': clients[owner.pk],
+                'other': clients[other.pk],
+            }
+            for viewer in VIEWERS:
+                results[f'{name}|{viewer}'] = self.measure(
+                    viewers[viewer], url, options)
+        return results
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings, queries = [], []
+        for _ in range(options['iterations']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries': max(queries),
+            'bytes': len(response.content),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"маршрут":<40}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"SQL":>6}{"байт":>9}'
+        )
+        for key, row in results.items():
+            self.stdout.write(
+                f'{key:<40}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                f'{row["p99_ms"]:>9.2f}{row["queries"]:>6}{row["bytes"]:>9}'
+            )
+
+    def compare(self, results, baseline, threshold, min_delta_ms):
+        regressions = []
+        for key, row in results.items():
+            base = baseline.get(key)
+            if base is None:
+                continue
+            delta = row['p95_ms'] - base['p95_ms']
+            if (
+                delta > min_delta_ms
+                and row['p95_ms'] > base['p95_ms'] * (1 + threshold)
+            ):
+                regressions.append(
+                    f'{key}: p95 {base["p95_ms"]:.2f} -> '
+                    f'{row["p95_ms"]:.2f} мс'
+                )
+            if row['queries'] > base['queries']:
+                regressions.append(
+                    f'{key}: запросов {base["queries"]} -> {row["queries"]}'
+                )
+        return regressions
@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+
+from blog.models import Comment, Post
+from blog.services import annotate_and_select_related, filter_published_posts
+from monitoring.management.commands.bench_routes import percentile
+
+User = get_user_model()
+
+MARKER = '[bench_sqlite]'
+MODES = {
+    'plain': {'SQLITE_PRAGMAS': {}, 'SQLITE_TRANSACTION_MODE': ''},
+    'tuned': {},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает SQLite параллельными читателями (страница ленты) и '
+        'писателями (комментарии) и сравнивает пропускную способность и '
+        'ошибки блокировки без прагм (plain) и с SQLITE_PRAGMAS (tuned). '
+        'Созданные комментарии удаляются после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument(
+            '--modes', default='plain,tuned',
+            help='Через запятую: ' + ', '.join(MODES) + '.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк предназначен только для SQLite.')
+        modes = options['modes'].split(',')
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f'Неизвестные режимы: {", ".join(unknown)}.')
+        post_ids = list(Post.objects.values_list('pk', flat=True)[:1000])
+        user_ids = list(User.objects.values_list('pk', flat=True)[:1000])
+        if not post_ids or not user_ids:
+            raise CommandError('База пуста: сначала выполните seed_blog.')
+
+        self.stdout.write(
+            f'{"режим":<8}{"чтений/с":>10}{"p95 чт.":>10}'
+            f'{"записей/с":>11}{"p95 зап.":>10}{"locked":>8}'
+        )
+        try:
+            for mode in modes:
+                connections.close_all()
+                with override_settings(**MODES[mode]):
+                    # Режим журнала меняется только без других соединений.
+                    journal_mode = settings.SQLITE_PRAGMAS.get(
+                        'journal_mode', 'DELETE')
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+                    row = self.run(post_ids, user_ids, options)
+                    connections.close_all()
+                self.stdout.write(
+                    f'{mode:<8}{row["reads"]:>10.0f}{row["read_p95"]:>10.2f}'
+                    f'{row["writes"]:>11.0f}{row["write_p95"]:>10.2f}'
+                    f'{row["locked"]:>8}'
+                )
+        finally:
+            connections.close_all()
+            Comment.objects.filter(text=MARKER).delete()
+
+    def run(self, post_ids, user_ids, options):
+        stop = threading.Event()
+        reads, writes, locked = [], [], []
+
+        def read():
+            queryset = annotate_and_select_related(
+                filter_published_posts(Post.objects.all()))
+            queryset.count()
+            list(queryset[:10])
+
+        def write():
+            with transaction.atomic():
+                Comment.objects.create(
+                    text=MARKER, post_id=random.choice(post_ids),
+                    author_id=random.choice(user_ids),
+                )
+
+        def worker(operation, timings):
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        operation()
+                    except OperationalError:
+                        locked.append(1)
+                        continue
+                    timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, args=(read, reads))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=(write, writes))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        duration = options['duration']
+        return {
+            'reads': len(reads) / duration,
+            'read_p95': percentile(reads, 0.95) if reads else 0.0,
+            'writes': len(writes) / duration,
+            'write_p95': percentile(writes, 0.95) if writes else 0.0,
+            'locked': len(locked),
+        }
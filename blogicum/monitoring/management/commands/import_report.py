@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP = (
+    'import time, django; started = time.perf_counter(); django.setup(); '
+    'print(f"setup {{time.perf_counter() - started:.6f}}"); {warmup}'
+)
+WARMUP = (
+    'from core.warmup import warmup; started = time.perf_counter(); '
+    'warmup(); print(f"warmup {time.perf_counter() - started:.6f}")'
+)
+
+
+def parse_importtime(stderr):
+    """Строки `-X importtime`: модуль -> (собственное, накопленное) в мкс."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+def by_package(modules):
+    packages = defaultdict(int)
+    for name, (own, _) in modules.items():
+        packages[name.split('.')[0]] += own
+    return packages
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает django.setup() в отдельном процессе с `-X importtime` и '
+        'показывает самые дорогие модули и пакеты. С --warmup дополнительно '
+        'меряет прогрев воркера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--warmup', action='store_true')
+
+    def handle(self, *args, **options):
+        code = SETUP.format(warmup=WARMUP if options['warmup'] else '')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if result.returncode:
+            # Последняя строка трассировки; процесс мог и промолчать.
+            output = result.stderr.strip() or result.stdout.strip()
+            lines = output.splitlines()
+            raise CommandError(
+                lines[-1] if lines
+                else f'Процесс завершился с кодом {result.returncode}.')
+        modules = parse_importtime(result.stderr)
+        top = options['top']
+
+        self.stdout.write(f'{"мс накопл.":>11} {"мс собств.":>11}  модуль')
+        ranked = sorted(
+            modules.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (own, cumulative) in ranked[:top]:
+            self.stdout.write(
+                f'{cumulative / 1000:11.1f} {own / 1000:11.1f}  {name}')
+
+        self.stdout.write(f'\n{"мс собств.":>11}  пакет')
+        packages = sorted(
+            by_package(modules).items(), key=lambda item: item[1],
+            reverse=True)
+        for name, own in packages[:top]:
+            self.stdout.write(f'{own / 1000:11.1f}  {name}')
+
+        self.stdout.write('')
+        for line in result.stdout.splitlines():
+            stage, seconds = line.split()
+            self.stdout.write(f'{stage}: {float(seconds) * 1000:.1f} мс')
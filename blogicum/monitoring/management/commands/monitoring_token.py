@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.constants import MEMORY_SALT, PROFILE_SALT
+from monitoring.triggers import make_token
+
+SALTS = {
+    'profile': PROFILE_SALT,
+    'memory': MEMORY_SALT,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выдаёт подписанный токен для диагностических режимов. Передайте его '
+        'от имени сотрудника в заголовке X-Profile (?_profile=) для cProfile '
+        'или X-Tracemalloc (?_tracemalloc=) для снимков памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--kind', choices=SALTS, default='profile')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(
+            username=options['username'], is_staff=True).first()
+        if user is None:
+            raise CommandError('Сотрудник с таким именем не найден.')
+        self.stdout.write(
+            make_token(user.get_username(), SALTS[options['kind']]))
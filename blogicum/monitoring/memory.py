@@ -0,0 +1,111 @@
+import os
+import signal
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+
+from .constants import MEMORY_TOP_ALLOCATIONS
+from .metrics import SIZE_BUCKETS, registry
+from .profiling import prune, snapshot_name
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+)
+_lock = threading.Lock()
+_tracing = {'requests': 0, 'started': False}
+
+
+def _write(name, lines):
+    directory = Path(settings.MEMORY_PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{name}.txt'
+    path.write_text('\n'.join(str(line) for line in lines) + '\n')
+    prune(directory, '*.txt', settings.PROFILING_KEEP)
+    return path
+
+
+def _begin():
+    with _lock:
+        if not _tracing['requests'] and not tracemalloc.is_tracing():
+            tracemalloc.start(settings.TRACEMALLOC_FRAMES)
+            _tracing['started'] = True
+        _tracing['requests'] += 1
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        baseline, _ = tracemalloc.get_traced_memory()
+    return before, baseline
+
+
+def _end():
+    with _lock:
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        _tracing['requests'] -= 1
+        if not _tracing['requests'] and _tracing['started']:
+            tracemalloc.stop()
+            _tracing['started'] = False
+    return current, peak, after
+
+
+def trace_request(get_response, request):
+    """Выполняет запрос под tracemalloc и сохраняет разницу снимков.
+
+    Пиковый прирост памяти за запрос уходит в гистограмму по view.
+    Блокировка держится только на запуске, остановке и снимках, поэтому
+    запросы под трассировкой идут параллельно; tracemalloc у процесса
+    один, и у параллельных запросов пик и разница снимков общие.
+    """
+    before, baseline = _begin()
+    try:
+        response = get_response(request)
+    finally:
+        current, peak, after = _end()
+    # Параллельный запрос мог сбросить пик после нашего снимка.
+    peak = max(peak, baseline)
+
+    match = request.resolver_match
+    view = match.view_name if match else 'unresolved'
+    registry.observe('blogicum_tracemalloc_peak_bytes', peak - baseline,
+                     buckets=SIZE_BUCKETS, view=view)
+    registry.observe('blogicum_tracemalloc_retained_bytes',
+                     max(current - baseline, 0), buckets=SIZE_BUCKETS,
+                     view=view)
+
+    name = snapshot_name(request)
+    _write(name, [
+        f'{request.method} {request.get_full_path()}',
+        f'peak: {peak - baseline} B, retained: {current - baseline} B',
+        '',
+        *after.compare_to(before, 'lineno')[:MEMORY_TOP_ALLOCATIONS],
+    ])
+    response['X-Tracemalloc-Id'] = name
+    response['X-Tracemalloc-Peak'] = peak - baseline
+    return response
+
+
+def dump_allocations(signum=None, frame=None):
+    """Обработчик сигнала: сохраняет крупнейшие места выделения памяти.
+
+    Если tracemalloc ещё не запущен, первый сигнал включает его,
+    а следующий пишет снимок.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.TRACEMALLOC_FRAMES)
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    current, peak = tracemalloc.get_traced_memory()
+    return _write(f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-live', [
+        f'pid {os.getpid()}, traced: {current} B, peak: {peak} B',
+        '',
+        *snapshot.statistics('lineno')[:MEMORY_TOP_ALLOCATIONS],
+    ])
+
+
+def install_dump_signal():
+    name = settings.MEMORY_DUMP_SIGNAL
+    if name and threading.current_thread() is threading.main_thread():
+        signal.signal(getattr(signal, name), dump_allocations)
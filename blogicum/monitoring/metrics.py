@@ -0,0 +1,195 @@
+"""Внутрипроцессный реестр метрик в формате Prometheus.
+
+Каждый поток пишет в собственный шард, поэтому обновление метрики не берёт
+блокировок. Когда поток завершается, его шард вливается в общий итог
+завершённых потоков, так что сервер с потоком на запрос не копит шарды.
+Процессы периодически сбрасывают свой снимок в METRICS_DIR,
+а эндпоинт складывает снимки всех воркеров.
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False)
+
+
+class Registry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._retired = self._new_shard()
+        self._buckets = {}
+        self._flushed_at = 0.0
+
+    @staticmethod
+    def _new_shard():
+        return {'counters': defaultdict(float), 'histograms': {}}
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = self._new_shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            weakref.finalize(threading.current_thread(), self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        with self._shards_lock:
+            self._shards.remove(shard)
+            merge_shard(self._retired, shard)
+
+    def inc(self, name, value=1, **labels):
+        self._shard()['counters'][_key(name, labels)] += value
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        self._buckets.setdefault(name, buckets)
+        histograms = self._shard()['histograms']
+        key = _key(name, labels)
+        row = histograms.get(key)
+        if row is None:
+            row = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        row[bisect_left(buckets, value)] += 1
+        row[-1] += value
+
+    def snapshot(self):
+        total = self._new_shard()
+        with self._shards_lock:
+            merge_shard(total, self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            merge_shard(total, shard)
+        return {
+            'counters': dict(total['counters']),
+            'histograms': total['histograms'],
+            'buckets': {name: list(b) for name, b in self._buckets.items()},
+        }
+
+    def flush(self):
+        directory = settings.METRICS_DIR
+        if directory is None:
+            return
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / f'metrics-{os.getpid()}.json'
+        temporary = target.with_suffix('.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, target)
+        self._flushed_at = time.monotonic()
+
+    def maybe_flush(self):
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+    def collect(self):
+        """Снимок текущего процесса, сложенный со снимками других воркеров."""
+        total = self.snapshot()
+        if settings.METRICS_DIR is None:
+            return total
+        own = f'metrics-{os.getpid()}.json'
+        for path in Path(settings.METRICS_DIR).glob('metrics-*.json'):
+            if path.name == own:
+                continue
+            try:
+                merge_snapshot(total, json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return total
+
+
+def merge_shard(total, shard):
+    for key, value in dict(shard['counters']).items():
+        total['counters'][key] += value
+    for key, row in dict(shard['histograms']).items():
+        merge_row(total['histograms'], key, list(row))
+
+
+def merge_row(histograms, key, row):
+    current = histograms.get(key)
+    if current is None:
+        histograms[key] = row
+    else:
+        for index, value in enumerate(row):
+            current[index] += value
+
+
+def merge_snapshot(total, other):
+    for key, value in other['counters'].items():
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for key, row in other['histograms'].items():
+        merge_row(total['histograms'], key, row)
+    for name, buckets in other['buckets'].items():
+        total['buckets'].setdefault(name, buckets)
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def render(snapshot):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    declared = set()
+
+    def declare(name, kind):
+        if name not in declared:
+            declared.add(name)
+            lines.append(f'# TYPE {name} {kind}')
+
+    for key in sorted(snapshot['counters']):
+        name, labels = json.loads(key)
+        declare(name, 'counter')
+        value = _number(snapshot['counters'][key])
+        lines.append(f'{name}{_labels(labels)} {value}')
+
+    for key in sorted(snapshot['histograms']):
+        name, labels = json.loads(key)
+        row = snapshot['histograms'][key]
+        buckets = snapshot['buckets'][name]
+        declare(name, 'histogram')
+        cumulative = 0
+        for bound, count in zip(buckets, row):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+        cumulative += row[len(buckets)]
+        lines.append(
+            f'{name}_bucket{_labels(labels, le="+Inf")} {cumulative}')
+        lines.append(f'{name}_sum{_labels(labels)} {_number(row[-1])}')
+        lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,207 @@
+import json
+import logging
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from .constants import (MEMORY_HEADER, MEMORY_PARAM, MEMORY_SALT,
+                        PROFILE_HEADER, PROFILE_PARAM, PROFILE_SALT,
+                        SERVER_TIMING_TEMPLATES)
+from .context import finish_request, start_request
+from .memory import trace_request
+from .metrics import COUNT_BUCKETS, SIZE_BUCKETS, registry
+from .profiling import profile_request
+from .sampling import profiler
+from .tracing import (current_span, finish_trace, span, start_trace,
+                      traced_call, traced_lazy, traceparent)
+from .triggers import is_triggered
+
+access_logger = logging.getLogger('monitoring.access')
+
+
+def server_timing(templates):
+    """Заголовок Server-Timing: шаблоны по убыванию полного времени."""
+    rows = sorted(templates.items(), key=lambda item: item[1][1],
+                  reverse=True)[:SERVER_TIMING_TEMPLATES]
+    return ', '.join(
+        f'tpl{index};dur={total * 1000:.2f};'
+        f'desc="{name} x{count} self={own * 1000:.2f}ms"'
+        for index, (name, (count, total, own)) in enumerate(rows)
+    )
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class TracingMiddleware:
+    """Открывает корневой спан запроса и возвращает идентификатор трассы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        root, token = start_trace(
+            request.method, request.META.get('HTTP_TRACEPARENT'),
+            **{'http.method': request.method,
+               'http.target': request.get_full_path()},
+        )
+        if root is None:
+            return self.get_response(request)
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            view = view_name(request)
+            root.name = f'{request.method} {view}'
+            root.attributes['http.route'] = view
+            if response is not None:
+                root.attributes['http.status_code'] = response.status_code
+            finish_trace(root, token)
+        response['traceparent'] = traceparent(root)
+        response['X-Trace-Id'] = root.trace_id
+        return response
+
+
+class ViewTracingMiddleware:
+    """Спаны для view, загрузки сессии и пользователя.
+
+    Стоит последним, когда сессия и ленивый request.user уже созданы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if current_span() is None:
+            return self.get_response(request)
+        user = request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject):
+            request.user = traced_lazy('auth.user', user)
+        session = getattr(request, 'session', None)
+        if session is not None:
+            session.load = traced_call('session.load', session.load)
+        with span('view') as view_span:
+            response = self.get_response(request)
+            view_span.name = f'view {view_name(request)}'
+        return response
+
+
+def log_access(request, response, view, elapsed, stats):
+    root = current_span()
+    access_logger.info(json.dumps({
+        'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'method': request.method,
+        'path': request.path,
+        'view': view,
+        'status': response.status_code,
+        'total_ms': round(elapsed * 1000, 3),
+        'db_ms': round(stats.db_time * 1000, 3),
+        'queries': stats.queries,
+        'template_ms': round(stats.template_time * 1000, 3),
+        'bytes': None if response.streaming else len(response.content),
+        'remote_addr': request.META.get('REMOTE_ADDR'),
+        'trace_id': root.trace_id if root else None,
+    }, ensure_ascii=False))
+
+
+class MetricsMiddleware:
+    """Собирает задержку, запросы к БД, рендеринг и размер ответа по view.
+
+    Те же данные пишутся строкой JSON в журнал доступа `monitoring.access`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats, token = start_request(request)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.track_query))
+                response = self.get_response(request)
+        finally:
+            finish_request(token)
+        elapsed = perf_counter() - started
+
+        view = view_name(request)
+        registry.inc(
+            'blogicum_requests_total', view=view, method=request.method,
+            status=response.status_code,
+        )
+        registry.observe('blogicum_request_duration_seconds', elapsed,
+                         view=view)
+        registry.observe('blogicum_db_queries_per_request', stats.queries,
+                         buckets=COUNT_BUCKETS, view=view)
+        registry.observe('blogicum_db_duration_seconds', stats.db_time,
+                         view=view)
+        registry.observe('blogicum_template_render_seconds',
+                         stats.template_time, view=view)
+        for name, (count, total, own) in stats.templates.items():
+            registry.inc('blogicum_template_renders_total', count,
+                         template=name)
+            registry.inc('blogicum_template_seconds_total', total,
+                         template=name)
+            registry.inc('blogicum_template_self_seconds_total', own,
+                         template=name)
+        user = getattr(request, 'user', None)
+        if stats.templates and user is not None and user.is_staff:
+            response['Server-Timing'] = server_timing(stats.templates)
+        if not response.streaming:
+            registry.observe('blogicum_response_bytes',
+                             len(response.content), buckets=SIZE_BUCKETS,
+                             view=view)
+        if access_logger.isEnabledFor(logging.INFO):
+            log_access(request, response, view, elapsed, stats)
+        registry.maybe_flush()
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует отдельный запрос сотрудника по подписанному токену."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if is_triggered(request, PROFILE_HEADER, PROFILE_PARAM, PROFILE_SALT):
+            return profile_request(self.get_response, request)
+        return self.get_response(request)
+
+
+class MemoryProfilingMiddleware:
+    """Снимает tracemalloc до и после запроса сотрудника по токену."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if is_triggered(request, MEMORY_HEADER, MEMORY_PARAM, MEMORY_SALT):
+            return trace_request(self.get_response, request)
+        return self.get_response(request)
+
+
+class SamplingProfilerMiddleware:
+    """Отмечает потоки запросов для сэмплирующего профилировщика."""
+
+    def __init__(self, get_response):
+        if not settings.SAMPLING_PROFILER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler.ensure_started()
+        profiler.register(request)
+        try:
+            return self.get_response(request)
+        finally:
+            profiler.unregister()
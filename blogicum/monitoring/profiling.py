@@ -0,0 +1,50 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from .constants import PROFILE_TOP_FUNCTIONS
+
+
+def prune(directory, pattern, keep):
+    """Оставляет в каталоге только `keep` самых свежих снимков."""
+    snapshots = sorted(directory.glob(pattern), key=os.path.getmtime)
+    for stale in snapshots[:max(len(snapshots) - keep, 0)]:
+        for path in directory.glob(f'{stale.stem}.*'):
+            path.unlink(missing_ok=True)
+
+
+def snapshot_name(request):
+    match = request.resolver_match
+    label = match.view_name if match else request.path
+    return (
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid4().hex[:8]}-'
+        f'{os.getpid()}-{slugify(label.replace(":", "-"))}'
+    )
+
+
+def profile_request(get_response, request):
+    """Выполняет запрос под cProfile и сохраняет .prof и текстовую сводку."""
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = snapshot_name(request)
+    profiler.dump_stats(directory / f'{name}.prof')
+
+    summary = io.StringIO()
+    summary.write(f'{request.method} {request.get_full_path()}\n\n')
+    pstats.Stats(profiler, stream=summary).sort_stats(
+        'cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    (directory / f'{name}.txt').write_text(summary.getvalue())
+
+    prune(directory, '*.prof', settings.PROFILING_KEEP)
+    response['X-Profile-Id'] = name
+    return response
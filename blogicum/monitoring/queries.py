@@ -0,0 +1,138 @@
+import json
+import logging
+import re
+import sys
+import threading
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.template.base import Node
+
+from .context import current_stats
+
+logger = logging.getLogger('monitoring.slow_queries')
+
+MONITORING_DIR = str(Path(__file__).resolve().parent)
+MAX_FINGERPRINTS = 1000
+MAX_ORIGINS = 5
+
+_LITERALS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE),
+     'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+_transparent_code = set()
+
+
+def transparent(function):
+    """Кадры функции не считаются источником запроса в query_origin()."""
+    _transparent_code.add(function.__code__)
+    return function
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """SQL без литералов: одинаковые по форме запросы дают один отпечаток."""
+    for pattern, replacement in _LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def query_origin():
+    """Шаблон и строка кода проекта, из которых выполнен запрос."""
+    template = code = None
+    frame = sys._getframe(2)
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None and not (template and code):
+        node = frame.f_locals.get('self')
+        # type(), а не isinstance(): иначе вычисляются SimpleLazyObject.
+        if template is None and issubclass(type(node), Node) and node.token:
+            template = f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if (
+            code is None and filename.startswith(base_dir)
+            and not filename.startswith(MONITORING_DIR)
+            and frame.f_code not in _transparent_code
+        ):
+            code = f'{Path(filename).relative_to(base_dir)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return ' <- '.join(part for part in (template, code) if part) or '?'
+
+
+class QueryLog:
+    """Агрегаты времени выполнения по отпечаткам SQL в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+
+    def record(self, sql, duration, origin):
+        with self._lock:
+            row = self._rows.get(sql)
+            if row is None:
+                if len(self._rows) >= MAX_FINGERPRINTS:
+                    return
+                row = self._rows[sql] = {
+                    'count': 0, 'total': 0.0, 'max': 0.0,
+                    'origins': Counter(),
+                }
+            row['count'] += 1
+            row['total'] += duration
+            row['max'] = max(row['max'], duration)
+            row['origins'][origin] += 1
+
+    def report(self):
+        with self._lock:
+            rows = [
+                {
+                    'fingerprint': sql,
+                    'count': row['count'],
+                    'total_ms': row['total'] * 1000,
+                    'mean_ms': row['total'] * 1000 / row['count'],
+                    'max_ms': row['max'] * 1000,
+                    'origins': row['origins'].most_common(MAX_ORIGINS),
+                }
+                for sql, row in self._rows.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+query_log = QueryLog()
+
+
+def log_query(execute, sql, params, many, context):
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = perf_counter() - started
+        stats = current_stats()
+        match = stats and getattr(stats.request, 'resolver_match', None)
+        view = match.view_name if match else '-'
+        origin = f'{view} <- {query_origin()}'
+        normalized = fingerprint(sql)
+        query_log.record(normalized, duration, origin)
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(json.dumps({
+                'fingerprint': normalized,
+                'duration_ms': round(duration * 1000, 3),
+                'origin': origin,
+                'database': context['connection'].alias,
+            }, ensure_ascii=False))
+
+
+def install_query_log(sender, connection, **kwargs):
+    wrappers = connection.execute_wrappers
+    if settings.SLOW_QUERY_LOG and log_query not in wrappers:
+        wrappers.append(log_query)
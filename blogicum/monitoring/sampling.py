@@ -0,0 +1,98 @@
+"""Сэмплирующий профилировщик запросов.
+
+Фоновый поток раз в SAMPLING_PROFILER_INTERVAL секунд снимает стеки потоков,
+которые сейчас обрабатывают запросы, и копит их в свёрнутом виде
+(`view;frame;frame count`), пригодном для flamegraph.pl и speedscope.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+from .profiling import prune
+
+MAX_DEPTH = 128
+
+
+def collapse(frame):
+    frames = []
+    while frame is not None and len(frames) < MAX_DEPTH:
+        code = frame.f_code
+        module = frame.f_globals.get('__name__', '?')
+        frames.append(f'{module}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(frames))
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._requests = {}
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        """Запускает поток в текущем процессе, в том числе после fork."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._requests.clear()
+            self._stacks.clear()
+            threading.Thread(
+                target=self._run, name='sampling-profiler', daemon=True
+            ).start()
+
+    def register(self, request):
+        self._requests[threading.get_ident()] = request
+
+    def unregister(self):
+        self._requests.pop(threading.get_ident(), None)
+
+    def sample(self):
+        frames = sys._current_frames()
+        for ident, request in list(self._requests.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            match = getattr(request, 'resolver_match', None)
+            view = match.view_name if match else 'unresolved'
+            stack = f'{view};{collapse(frame)}'
+            with self._lock:
+                self._stacks[stack] += 1
+
+    def flush(self):
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+        if not stacks:
+            return None
+        directory = Path(settings.SAMPLING_PROFILER_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / (
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.folded')
+        path.write_text(''.join(
+            f'{stack} {count}\n' for stack, count in stacks.items()))
+        prune(directory, '*.folded', settings.SAMPLING_PROFILER_KEEP)
+        return path
+
+    def _run(self):
+        pid = os.getpid()
+        flushed_at = time.monotonic()
+        while self._pid == pid:
+            time.sleep(settings.SAMPLING_PROFILER_INTERVAL)
+            self.sample()
+            if (
+                time.monotonic() - flushed_at
+                >= settings.SAMPLING_PROFILER_FLUSH_INTERVAL
+            ):
+                self.flush()
+                flushed_at = time.monotonic()
+
+
+profiler = SamplingProfiler()
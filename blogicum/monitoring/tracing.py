@@ -0,0 +1,181 @@
+"""Трассировка запросов вложенными спанами.
+
+Готовая трасса пишется в журнал `monitoring.traces` одной строкой JSON
+в формате OTLP/JSON (ExportTraceServiceRequest), который читают
+OpenTelemetry Collector (filelog/otlpjsonfile) и совместимые просмотрщики.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject, empty
+
+logger = logging.getLogger('monitoring.traces')
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+MAX_STATEMENT_LENGTH = 1000
+
+TRACEPARENT = re.compile(
+    r'^00-(?P<trace_id>[0-9a-f]{32})-(?P<parent_id>[0-9a-f]{16})-'
+    r'(?P<flags>[0-9a-f]{2})$'
+)
+
+_current = ContextVar('span', default=None)
+
+
+def _hex_id(bytes_count):
+    return os.urandom(bytes_count).hex()
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class Span:
+    def __init__(self, name, trace, parent_id=None,
+                 kind=SPAN_KIND_INTERNAL, **attributes):
+        self.name = name
+        self.trace = trace
+        self.trace_id = trace['trace_id']
+        self.span_id = _hex_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.error = None
+        self.start = time.time_ns()
+        self.end = None
+        trace['spans'].append(self)
+
+    def finish(self):
+        self.end = time.time_ns()
+
+    def as_otlp(self):
+        data = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or time.time_ns()),
+            'attributes': [
+                _attribute(key, value)
+                for key, value in self.attributes.items()
+            ],
+        }
+        if self.parent_id:
+            data['parentSpanId'] = self.parent_id
+        if self.error:
+            data['status'] = {
+                'code': STATUS_CODE_ERROR, 'message': self.error}
+        return data
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    """Дочерний спан текущей трассы; вне трассы ничего не делает."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace, parent.span_id, kind, **attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as error:
+        child.error = f'{type(error).__name__}: {error}'
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def start_trace(name, traceparent=None, **attributes):
+    """Корневой спан запроса или None, если запрос не попал в выборку.
+
+    Входящий `traceparent` (W3C Trace Context) с флагом sampled продолжает
+    чужую трассу.
+    """
+    match = TRACEPARENT.match(traceparent or '')
+    if match and int(match['flags'], 16) & 1:
+        trace = {'trace_id': match['trace_id'], 'spans': []}
+        parent_id = match['parent_id']
+    elif random.random() < settings.TRACING_SAMPLE_RATE:
+        trace = {'trace_id': _hex_id(16), 'spans': []}
+        parent_id = None
+    else:
+        return None, None
+    root = Span(name, trace, parent_id, SPAN_KIND_SERVER, **attributes)
+    return root, _current.set(root)
+
+
+def finish_trace(root, token):
+    root.finish()
+    _current.reset(token)
+    logger.info(json.dumps({'resourceSpans': [{
+        'resource': {'attributes': [
+            _attribute('service.name', settings.TRACING_SERVICE_NAME),
+            _attribute('process.pid', os.getpid()),
+        ]},
+        'scopeSpans': [{
+            'scope': {'name': 'monitoring.tracing'},
+            'spans': [item.as_otlp() for item in root.trace['spans']],
+        }],
+    }]}, ensure_ascii=False))
+
+
+def traceparent(root):
+    return f'00-{root.trace_id}-{root.span_id}-01'
+
+
+def trace_query(execute, sql, params, many, context):
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    connection = context['connection']
+    with span('db.query', SPAN_KIND_CLIENT,
+              **{'db.system': connection.vendor,
+                 'db.name': connection.alias,
+                 'db.statement': sql[:MAX_STATEMENT_LENGTH]}):
+        return execute(sql, params, many, context)
+
+
+def install_query_tracing(sender, connection, **kwargs):
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_query)
+
+
+def traced_lazy(name, lazy):
+    """Первое вычисление ленивого объекта попадает в трассу спаном."""
+    def setup():
+        if lazy._wrapped is empty:
+            with span(name):
+                lazy._setup()
+        return lazy._wrapped
+    return SimpleLazyObject(setup)
+
+
+def traced_call(name, function):
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return function(*args, **kwargs)
+    return wrapper
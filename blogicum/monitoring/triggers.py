@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core import signing
+
+
+def make_token(username, salt):
+    return signing.dumps(username, salt=salt)
+
+
+def is_triggered(request, header, param, salt):
+    """Запрошен ли диагностический режим подписанным токеном сотрудника.
+
+    Для обычных запросов проверяются только META и сырая строка запроса,
+    без разбора GET и загрузки пользователя.
+    """
+    token = request.META.get(header)
+    if token is None:
+        if param not in request.META.get('QUERY_STRING', ''):
+            return False
+        token = request.GET.get(param)
+    if not token or not request.user.is_staff:
+        return False
+    try:
+        username = signing.loads(
+            token, salt=salt, max_age=settings.MONITORING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return username == request.user.get_username()
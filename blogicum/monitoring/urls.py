@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('metrics/', views.metrics, name='metrics'),
+    path('queries/', views.slow_queries, name='slow_queries'),
+]
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.utils.crypto import constant_time_compare
+
+from .metrics import registry, render as render_metrics
+from .queries import query_log
+
+
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if not request.user.is_staff and not (
+        token and constant_time_compare(authorization, f'Bearer {token}')
+    ):
+        return HttpResponse(status=403)
+    registry.flush()
+    return HttpResponse(
+        render_metrics(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def slow_queries(request):
+    if request.method == 'POST':
+        query_log.clear()
+        return redirect('monitoring:slow_queries')
+    return render(request, 'monitoring/slow_queries.html', {
+        'rows': query_log.report(),
+        'threshold_ms': settings.SLOW_QUERY_THRESHOLD_MS,
+    })
@@ -41,6 +41,22 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    from core.throttling import buckets, windows
+
+    buckets.clear()
+    windows.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_reference_tables():
+    from blog.reference import categories, locations
+
+    categories.clear()
+    locations.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -133,6 +149,13 @@ def another_user_client(another_user):
     return client
 
 
+@pytest.fixture
+def write_queue(settings, tmp_path):
+    settings.WRITE_QUEUE = True
+    settings.WRITE_QUEUE_LINGER = 0.05
+    settings.WRITE_QUEUE_LOCK = tmp_path / "write.lock"
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
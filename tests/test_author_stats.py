@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.deletion import schedule_deletion
+from blog.models import AuthorStats
+from blog.stats import author_stats, rebuild
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def author_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, is_deleted=False,
+        pub_date=timezone.now() - timedelta(days=1))
+
+
+def stats_of(user):
+    return AuthorStats.objects.get(author=user)
+
+
+def test_stats_follow_writes(
+        mixer, user, another_user, author_post, published_category):
+    author_stats(user)
+    author_stats(another_user)
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=False, is_deleted=False)
+    comment = mixer.blend("blog.Comment", post=author_post,
+                          author=another_user, is_deleted=False)
+    stats = stats_of(user)
+    assert (stats.total_posts, stats.published_posts) == (2, 1)
+    assert stats.comments_received == 1
+    assert stats.last_post_date == author_post.pub_date
+    assert stats_of(another_user).comments_written == 1
+
+    comment.delete()
+    published_category.is_published = False
+    published_category.save()
+    stats = stats_of(user)
+    assert (stats.published_posts, stats.comments_received) == (0, 0)
+    assert stats_of(another_user).comments_written == 0
+
+
+def test_deferred_post_is_counted_once_due(user, author_post):
+    author_post.pub_date = timezone.now() + timedelta(days=1)
+    author_post.save()
+    stats = author_stats(user)
+    assert stats.published_posts == 0
+    assert stats.next_publication == author_post.pub_date
+    # Время прошло: сигналов не было, строку пересчитывает задача по
+    # расписанию, а чтение ничего не пишет.
+    past = timezone.now() - timedelta(seconds=1)
+    type(author_post).objects.filter(pk=author_post.pk).update(pub_date=past)
+    AuthorStats.objects.filter(author=user).update(next_publication=past)
+    with CaptureQueriesContext(connection) as captured:
+        assert author_stats(user).published_posts == 0
+    assert all(query["sql"].startswith("SELECT")
+               for query in captured.captured_queries)
+    call_command("rebuild_stats", due=True, stdout=StringIO())
+    assert author_stats(user).published_posts == 1
+
+
+def test_hidden_content_is_subtracted(mixer, user, another_user, author_post):
+    mixer.blend("blog.Comment", post=author_post, author=another_user,
+                is_deleted=False)
+    author_stats(user)
+    author_stats(another_user)
+    schedule_deletion(author_post)
+    assert stats_of(user).total_posts == 0
+    assert stats_of(another_user).comments_written == 0
+    rebuild()
+    assert stats_of(another_user).comments_written == 0
+
+
+def test_profile_uses_stats_for_page_count(
+        client, user, author_post):
+    author_stats(user)
+    response = client.get(f"/profile/{user.username}/")
+    assert response.context["page_obj"].paginator.count == 1
+    assert "Публикаций: 1" in response.content.decode()
+
+
+def test_post_writes_shift_counters_without_aggregates(
+        mixer, user, author_post, published_category):
+    author_stats(user)
+    post = type(author_post).objects.get(pk=author_post.pk)
+    post.title = "Новый заголовок"
+    with CaptureQueriesContext(connection) as captured:
+        post.save()
+    assert not [query for query in captured.captured_queries
+                if "blog_authorstats" in query["sql"]]
+
+    newer = timezone.now() - timedelta(hours=1)
+    with CaptureQueriesContext(connection) as captured:
+        mixer.blend("blog.Post", author=user, category=published_category,
+                    is_published=True, is_deleted=False, pub_date=newer)
+        post.is_published = False
+        post.save()
+    assert not [query for query in captured.captured_queries
+                if "COUNT(" in query["sql"]]
+    stats = stats_of(user)
+    assert (stats.total_posts, stats.published_posts) == (2, 1)
+    assert stats.last_post_date == newer
+
+    post.delete()
+    assert (stats_of(user).total_posts, stats_of(user).last_post_date) == (
+        1, newer)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.deletion import schedule_deletion
+from blog.models import CategoryStats
+
+pytestmark = [pytest.mark.django_db]
+
+
+def blend_posts(mixer, category, count, days=1):
+    return mixer.cycle(count).blend(
+        "blog.Post", category=category, is_published=True,
+        is_deleted=False, pub_date=timezone.now() - timedelta(days=days))
+
+
+def directory_queries(client):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/category/")
+    assert response.status_code == 200
+    return response, len(context)
+
+
+def test_directory_costs_constant_queries(mixer, client):
+    for category in mixer.cycle(2).blend("blog.Category", is_published=True):
+        blend_posts(mixer, category, 4)
+    directory_queries(client)
+    _, few = directory_queries(client)
+    for category in mixer.cycle(4).blend("blog.Category", is_published=True):
+        blend_posts(mixer, category, 4)
+    directory_queries(client)
+    response, many = directory_queries(client)
+    assert few == many
+    categories = response.context["categories"]
+    assert len(categories) == 6
+    assert all(len(category.latest_posts) == 3 for category in categories)
+
+
+def test_summary_follows_post_writes(
+        mixer, client, published_category, another_category):
+    (older,) = blend_posts(mixer, published_category, 1, days=3)
+    newer = blend_posts(mixer, published_category, 3)
+    stats = CategoryStats.objects.get(category=published_category)
+    assert stats.published_posts == 4
+    assert older.pk not in stats.latest_posts
+
+    newer[0].category = another_category
+    newer[0].save()
+    schedule_deletion(newer[1])
+    stats.refresh_from_db()
+    assert stats.published_posts == 2
+    assert stats.latest_posts == [newer[2].pk, older.pk]
+    assert CategoryStats.objects.get(
+        category=another_category).latest_posts == [newer[0].pk]
+
+    published_category.is_published = False
+    published_category.save()
+    stats.refresh_from_db()
+    assert (stats.published_posts, stats.latest_posts) == (0, [])
+    titles = [category.title
+              for category in client.get("/category/").context["categories"]]
+    assert titles == [another_category.title]
+
+
+def test_summary_shifts_without_scanning_category(
+        mixer, published_category):
+    posts = blend_posts(mixer, published_category, 4, days=2)
+    stats = CategoryStats.objects.get(category=published_category)
+    (newer,) = blend_posts(mixer, published_category, 1)
+    with CaptureQueriesContext(connection) as context:
+        newer.title = "Новый заголовок"
+        newer.save()
+    assert len(context) == 1
+    with CaptureQueriesContext(connection) as context:
+        mixer.blend("blog.Post", category=published_category,
+                    author=newer.author, is_published=True, is_deleted=False,
+                    pub_date=timezone.now() - timedelta(days=3))
+    assert not [query for query in context.captured_queries
+                if "COUNT(" in query["sql"]]
+    stats.refresh_from_db()
+    assert stats.published_posts == 6
+    assert stats.latest_posts[0] == newer.pk
+    assert set(stats.latest_posts[1:]) < {post.pk for post in posts}
+
+
+def test_deferred_post_enters_summary_on_schedule(
+        mixer, client, published_category):
+    (post,) = blend_posts(mixer, published_category, 1, days=-1)
+    stats = CategoryStats.objects.get(category=published_category)
+    assert (stats.published_posts, stats.latest_posts) == (0, [])
+    past = timezone.now() - timedelta(seconds=1)
+    type(post).objects.filter(pk=post.pk).update(pub_date=past)
+    CategoryStats.objects.update(next_publication=past)
+    client.get("/category/")
+    stats.refresh_from_db()
+    assert stats.published_posts == 0
+    call_command("rebuild_stats", due=True, stdout=StringIO())
+    stats.refresh_from_db()
+    assert (stats.published_posts, stats.latest_posts) == (1, [post.pk])
@@ -0,0 +1,86 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+JSON = {"HTTP_ACCEPT": "application/json"}
+
+
+@pytest.fixture
+def own_comment(mixer, user, post_with_published_location):
+    return mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user)
+
+
+def test_add_comment_returns_fragment(
+        user_client, post_with_published_location):
+    response = user_client.post(
+        f"/posts/{post_with_published_location.id}/comment/",
+        {"text": "Новый комментарий"}, **AJAX)
+    assert response.status_code == 201
+    comment = Comment.objects.get()
+    html = response.content.decode()
+    assert html.strip().startswith(f'<div class="media mb-4" '
+                                   f'id="comment_{comment.id}">')
+    assert "Новый комментарий" in html and "<html" not in html
+
+
+def test_edit_comment_returns_json(user_client, own_comment):
+    comment = own_comment
+    response = user_client.post(
+        f"/posts/{comment.post_id}/edit_comment/{comment.id}/",
+        {"text": "Исправлено"}, **JSON)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == comment.id and "Исправлено" in data["html"]
+
+
+def test_invalid_comment_returns_errors(
+        user_client, post_with_published_location):
+    response = user_client.post(
+        f"/posts/{post_with_published_location.id}/comment/",
+        {"text": ""}, **JSON)
+    assert response.status_code == 400
+    assert "text" in response.json()["errors"]
+
+
+def test_foreign_comment_edit_is_forbidden(
+        another_user_client, own_comment):
+    comment = own_comment
+    response = another_user_client.post(
+        f"/posts/{comment.post_id}/edit_comment/{comment.id}/",
+        {"text": "Чужое"}, **AJAX)
+    assert response.status_code == 403
+
+
+def test_comment_form_resubmits_only_on_server_failure(
+        user_client, post_with_published_location):
+    response = user_client.get(f"/posts/{post_with_published_location.id}/")
+    html = response.content.decode()
+    assert "data-comment-errors" in html
+    assert "!response.ok) {\n          form.submit()" not in html
+    assert "response.status >= 500" in html
+    errors = user_client.post(
+        f"/posts/{post_with_published_location.id}/comment/",
+        {"text": ""}, **AJAX)
+    assert errors.status_code == 400
+    assert errors.content.decode().startswith('<ul class="errorlist">')
+
+
+def test_page_and_fragment_render_the_same_comment(
+        user_client, own_comment):
+    comment = own_comment
+    page = user_client.get(f"/posts/{comment.post_id}/").content.decode()
+    fragment = user_client.post(
+        f"/posts/{comment.post_id}/edit_comment/{comment.id}/",
+        {"text": comment.text}, **AJAX).content.decode()
+
+    def markup(html):
+        block = BeautifulSoup(html, "html.parser").find(
+            id=f"comment_{comment.id}")
+        return " ".join(str(block).split())
+
+    assert markup(page) == markup(fragment)
@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.deletion import process_task, schedule_deletion
+from blog.models import Comment, DeletionTask, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def busy_post(mixer, user, another_user, post_with_published_location):
+    post_with_published_location.author = user
+    post_with_published_location.save()
+    mixer.cycle(5).blend(
+        "blog.Comment", post=post_with_published_location,
+        author=another_user)
+    return post_with_published_location
+
+
+def test_post_is_hidden_then_purged_in_batches(user_client, busy_post):
+    response = user_client.post(f"/posts/{busy_post.id}/delete/")
+    assert response.status_code == 302
+    assert user_client.get(f"/posts/{busy_post.id}/").status_code == 404
+    assert not Comment.objects.exists()
+    task = DeletionTask.objects.get()
+    assert Comment._base_manager.count() == 5
+
+    process_task(task, batch_size=2, max_batches=2)
+    task.refresh_from_db()
+    assert task.status == DeletionTask.PENDING
+    assert (task.deleted_rows, Comment._base_manager.count()) == (4, 1)
+
+    call_command("process_deletions", batch_size=2, stdout=None)
+    task.refresh_from_db()
+    assert task.status == DeletionTask.DONE
+    assert task.deleted_rows == 6
+    assert not Post._base_manager.filter(pk=busy_post.pk).exists()
+
+
+def test_user_deletion_cascades_in_background(
+        mixer, user, another_user, busy_post):
+    foreign_post = mixer.blend("blog.Post", author=another_user)
+    mixer.blend("blog.Comment", post=foreign_post, author=user)
+    task = schedule_deletion(user)
+    assert not get_user_model().objects.get(pk=user.pk).is_active
+    assert list(Comment.objects.all()) == []
+    assert list(Post.objects.all()) == [foreign_post]
+
+    process_task(task, batch_size=3)
+    assert task.status == DeletionTask.DONE
+    assert not get_user_model().objects.filter(pk=user.pk).exists()
+    assert Comment._base_manager.count() == 0
+    assert list(Post._base_manager.all()) == [foreign_post]
+
+
+def test_admin_confirmation_does_not_walk_cascade(
+        mixer, admin_client, user, busy_post):
+    url = f"/admin/auth/user/{user.pk}/delete/"
+    admin_client.get(url)
+    with CaptureQueriesContext(connection) as few:
+        response = admin_client.get(url)
+    assert "удаление в фоне" in response.content.decode()
+    mixer.cycle(20).blend("blog.Comment", post=busy_post, author=user)
+    with CaptureQueriesContext(connection) as many:
+        admin_client.get(url)
+    assert len(few) == len(many)
+    assert all("blog_comment\".\"text" not in query["sql"]
+               for query in many.captured_queries)
+
+    response = admin_client.post("/admin/auth/user/", {
+        "action": "delete_selected", "_selected_action": [user.pk]})
+    assert response.status_code == 200
+    assert "удаление в фоне" in response.content.decode()
+    assert get_user_model().objects.filter(pk=user.pk).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_admin_deletes_through_write_queue(
+        write_queue, mixer, admin_client, user, busy_post):
+    response = admin_client.post(
+        f"/admin/blog/post/{busy_post.pk}/delete/", {"post": "yes"})
+    assert response.status_code == 302
+    assert not Post.objects.filter(pk=busy_post.pk).exists()
+    response = admin_client.post("/admin/auth/user/", {
+        "action": "delete_selected", "_selected_action": [user.pk],
+        "post": "yes"})
+    assert response.status_code == 302
+    assert sorted(DeletionTask.objects.values_list("model", flat=True)) == [
+        "auth.user", "blog.post"]
+
+
+def test_deactivated_author_is_not_treated_as_deleted(
+        client, mixer, user, another_user):
+    another_user.is_active = False
+    another_user.save()
+    schedule_deletion(user)
+    for username, status in ((another_user.username, 200),
+                             (user.username, 404)):
+        assert client.get(f"/profile/{username}/").status_code == status
+        assert client.get(
+            f"/profile/{username}/feed/").status_code == status
+
+
+def test_task_is_created_with_the_hide(busy_post, monkeypatch):
+    def broken(**kwargs):
+        raise RuntimeError("Сбой")
+
+    monkeypatch.setattr(DeletionTask.objects, "create", broken)
+    with pytest.raises(RuntimeError):
+        schedule_deletion(busy_post)
+    assert Post.objects.filter(pk=busy_post.pk).exists()
+    assert Comment.objects.count() == 5
+
+
+def test_task_is_claimed_by_one_runner(busy_post):
+    schedule_deletion(busy_post)
+    first = DeletionTask.objects.get()
+    second = DeletionTask.objects.get()
+    assert process_task(first, batch_size=2, max_batches=1) is first
+    assert process_task(second, batch_size=2) is None
+    assert Comment._base_manager.count() == 3
+
+    abandoned = timezone.now() - timedelta(hours=1)
+    DeletionTask.objects.update(
+        status=DeletionTask.RUNNING, updated_at=abandoned)
+    running = DeletionTask.objects.get()
+    assert process_task(running, batch_size=2).status == DeletionTask.DONE
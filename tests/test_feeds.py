@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    published = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, is_deleted=False,
+        pub_date=timezone.now() - timedelta(hours=1))
+    hidden = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False, is_deleted=False)
+    return published, hidden
+
+
+@pytest.mark.parametrize("suffix", ["", "atom/"])
+def test_feeds_follow_visibility_rules(client, feed_posts, suffix):
+    published, hidden = feed_posts
+    for url in ("/feed/",
+                f"/category/{published.category.slug}/feed/",
+                f"/profile/{published.author.username}/feed/"):
+        response = client.get(url + suffix)
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert f"/posts/{published.pk}/" in body
+        assert f"/posts/{hidden.pk}/" not in body
+    assert client.get(f"/category/missing/feed/{suffix}").status_code == 404
+
+
+def test_feed_is_conditional_and_cached(client, feed_posts):
+    published, _ = feed_posts
+    response = client.get("/feed/")
+    etag = response["ETag"]
+    assert response["Last-Modified"]
+
+    with CaptureQueriesContext(connection) as context:
+        cached = client.get("/feed/")
+    assert cached.content == response.content
+    assert len(context) == 1
+    assert client.get(
+        "/feed/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    published.title = "Новый заголовок"
+    published.save()
+    response = client.get("/feed/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert "Новый заголовок" in response.content.decode()
+
+
+def test_feed_validator_comes_from_database(client, feed_posts):
+    published, _ = feed_posts
+    etag = client.get("/feed/")["ETag"]
+    cache.clear()
+    assert client.get(
+        "/feed/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    # Запись из другого воркера: ни сигналов, ни общего кэша.
+    Post.objects.filter(pk=published.pk).update(
+        title="Правка", updated_at=timezone.now())
+    response = client.get("/feed/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "Правка" in response.content.decode()
+
+
+def test_login_keeps_feed_etag_but_rename_changes_it(
+        client, user, feed_posts):
+    user.set_password("password")
+    user.save()
+    etag = client.get("/feed/")["ETag"]
+    assert client.login(username=user.username, password="password")
+    assert Client().get(
+        "/feed/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    user.username = "renamed"
+    user.save(update_fields=["username"])
+    assert Client().get(
+        "/feed/", HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,343 @@
+import gc
+import io
+import json
+import logging
+import subprocess
+import threading
+import tracemalloc
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.client import Client
+
+from monitoring.constants import MEMORY_SALT, PROFILE_SALT
+from monitoring.logging import BackgroundRotatingFileHandler
+from monitoring.memory import dump_allocations, trace_request
+from monitoring.metrics import Registry, render
+from monitoring.queries import fingerprint, query_log
+from monitoring.sampling import profiler as sampling_profiler
+from monitoring.triggers import make_token
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def staff_user():
+    return get_user_model().objects.create_user(
+        "staff", password="password", is_staff=True)
+
+
+@pytest.fixture
+def staff_client(staff_user):
+    client = Client()
+    client.force_login(staff_user)
+    return client
+
+
+@pytest.fixture
+def profiling_dir(tmp_path):
+    with override_settings(PROFILING_DIR=tmp_path, PROFILING_KEEP=2):
+        yield tmp_path
+
+
+def test_profile_is_captured_for_staff_token(
+        staff_client, staff_user, profiling_dir):
+    token = make_token(staff_user.username, PROFILE_SALT)
+    response = staff_client.get("/", HTTP_X_PROFILE=token)
+    profile_id = response["X-Profile-Id"]
+    assert (profiling_dir / f"{profile_id}.prof").exists()
+    assert "cumulative" in (profiling_dir / f"{profile_id}.txt").read_text()
+
+
+def test_profile_ring_buffer_is_bounded(
+        staff_client, staff_user, profiling_dir):
+    token = make_token(staff_user.username, PROFILE_SALT)
+    for _ in range(4):
+        staff_client.get(f"/?_profile={token}")
+    assert len(list(profiling_dir.glob("*.prof"))) <= 2
+
+
+def test_profile_requires_staff_and_valid_token(
+        user, user_client, staff_client, profiling_dir):
+    foreign_token = make_token(user.username, PROFILE_SALT)
+    response = user_client.get("/", HTTP_X_PROFILE=foreign_token)
+    assert "X-Profile-Id" not in response
+    response = staff_client.get("/", HTTP_X_PROFILE="forged")
+    assert "X-Profile-Id" not in response
+    assert not list(profiling_dir.iterdir())
+
+
+def test_metrics_endpoint_reports_views(staff_client, unlogged_client):
+    unlogged_client.get("/")
+    response = staff_client.get("/monitoring/metrics/")
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'blogicum_request_duration_seconds_bucket{view="blog:index"' in body
+    assert 'blogicum_db_queries_per_request_count{view="blog:index"}' in body
+    assert 'blogicum_template_render_seconds_sum{view="blog:index"}' in body
+    assert 'blogicum_response_bytes_count{view="blog:index"}' in body
+
+
+def test_metrics_endpoint_requires_staff_or_token(unlogged_client):
+    assert unlogged_client.get("/monitoring/metrics/").status_code == 403
+    with override_settings(METRICS_TOKEN="secret"):
+        response = unlogged_client.get(
+            "/monitoring/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+    assert response.status_code == 200
+
+
+def test_metrics_are_aggregated_across_workers(tmp_path):
+    first, second = Registry(), Registry()
+    first.inc("blogicum_requests_total", view="blog:index")
+    second.inc("blogicum_requests_total", 2, view="blog:index")
+    second.observe("blogicum_request_duration_seconds", 0.02,
+                   view="blog:index")
+    (tmp_path / "metrics-1.json").write_text(
+        json.dumps(second.snapshot()))
+    with override_settings(METRICS_DIR=tmp_path):
+        body = render(first.collect())
+    assert 'blogicum_requests_total{view="blog:index"} 3' in body
+    assert (
+        'blogicum_request_duration_seconds_bucket'
+        '{view="blog:index",le="0.025"} 1'
+    ) in body
+
+
+def test_finished_threads_do_not_leave_shards():
+    registry = Registry()
+
+    def work():
+        registry.inc("blogicum_requests_total", view="blog:index")
+        registry.observe("blogicum_request_duration_seconds", 0.02,
+                         view="blog:index")
+
+    for _ in range(20):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    del thread
+    gc.collect()
+    assert registry._shards == []
+    snapshot = registry.snapshot()
+    key = '["blogicum_requests_total", [["view", "blog:index"]]]'
+    assert snapshot["counters"][key] == 20
+    duration = snapshot["histograms"][key.replace(
+        "requests_total", "request_duration_seconds")]
+    assert duration[2] == 20
+
+
+def test_sql_fingerprint_strips_literals():
+    assert fingerprint(
+        "SELECT * FROM blog_post WHERE id IN (1, 2, 3) AND title = 'x''y'"
+    ) == fingerprint(
+        "SELECT *  FROM blog_post WHERE id IN (7) AND title = 'z'"
+    ) == "SELECT * FROM blog_post WHERE id IN (...) AND title = ?"
+
+
+def test_slow_query_report_attributes_origin(
+        staff_client, unlogged_client, post_with_published_location):
+    query_log.clear()
+    unlogged_client.get("/")
+    response = staff_client.get("/monitoring/queries/")
+    assert response.status_code == 200
+    origins = [
+        origin for row in response.context["rows"]
+        for origin, _ in row["origins"]
+    ]
+    assert any(
+        origin.startswith("blog:index <- ") and "blog/views.py" in origin
+        for origin in origins
+    )
+    assert any("includes/paginator.html" in origin or "blog/index.html"
+               in origin for origin in origins)
+
+
+def test_slow_query_report_is_staff_only(user_client):
+    response = user_client.get("/monitoring/queries/")
+    assert response.status_code == 302
+
+
+def test_template_timing_header_for_staff(
+        staff_client, unlogged_client, many_posts_with_published_locations):
+    header = staff_client.get("/")["Server-Timing"]
+    assert 'desc="includes/post_card.html x10 ' in header
+    assert "blog/index.html x1" in header and "base.html x1" in header
+    assert "Server-Timing" not in unlogged_client.get("/")
+    body = staff_client.get("/monitoring/metrics/").content.decode()
+    assert (
+        'blogicum_template_renders_total'
+        '{template="includes/category_link.html"}'
+    ) in body
+
+
+def test_sampling_profiler_writes_collapsed_stacks(
+        tmp_path, many_posts_with_published_locations):
+    with override_settings(
+            SAMPLING_PROFILER=True, SAMPLING_PROFILER_INTERVAL=0.0005,
+            SAMPLING_PROFILER_DIR=tmp_path):
+        client = Client()
+        for _ in range(5):
+            client.get("/")
+        path = sampling_profiler.flush()
+    assert path is not None and path.parent == tmp_path
+    lines = path.read_text().splitlines()
+    assert any(line.startswith("blog:index;") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_tracemalloc_snapshot_for_staff_token(
+        staff_client, staff_user, tmp_path, post_with_published_location):
+    token = make_token(staff_user.username, MEMORY_SALT)
+    with override_settings(MEMORY_PROFILING_DIR=tmp_path):
+        response = staff_client.get(
+            f"/posts/{post_with_published_location.id}/",
+            HTTP_X_TRACEMALLOC=token,
+        )
+    assert int(response["X-Tracemalloc-Peak"]) > 0
+    report = (tmp_path / f"{response['X-Tracemalloc-Id']}.txt").read_text()
+    assert report.startswith(
+        f"GET /posts/{post_with_published_location.id}/")
+    assert not tracemalloc.is_tracing()
+
+
+def test_live_allocation_dump(tmp_path):
+    with override_settings(MEMORY_PROFILING_DIR=tmp_path):
+        assert dump_allocations() is None
+        try:
+            path = dump_allocations()
+        finally:
+            tracemalloc.stop()
+    assert "traced:" in path.read_text()
+
+
+@pytest.fixture
+def trace_records():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("monitoring.traces")
+    logger.addHandler(handler)
+    yield records
+    logger.removeHandler(handler)
+
+
+def test_trace_is_exported_for_sampled_traceparent(
+        user_client, trace_records, post_with_published_location):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    response = user_client.get(
+        f"/posts/{post_with_published_location.id}/",
+        HTTP_TRACEPARENT=f"00-{trace_id}-00f067aa0ba902b7-01",
+    )
+    assert response["X-Trace-Id"] == trace_id
+    assert response["traceparent"].startswith(f"00-{trace_id}-")
+    (record,) = trace_records
+    spans = json.loads(record.getMessage())[
+        "resourceSpans"][0]["scopeSpans"][0]["spans"]
+    names = [item["name"] for item in spans]
+    assert "GET blog:post_detail" in names
+    assert "view blog:post_detail" in names
+    assert {"session.load", "auth.user", "db.query",
+            "template.render"} <= set(names)
+    by_id = {item["spanId"]: item for item in spans}
+    root = next(item for item in spans if item["name"].startswith("GET"))
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    assert all(
+        item["parentSpanId"] in by_id for item in spans if item is not root)
+
+
+def test_unsampled_requests_are_not_traced(unlogged_client, trace_records):
+    response = unlogged_client.get("/")
+    assert "X-Trace-Id" not in response
+    assert not trace_records
+
+
+@pytest.fixture
+def access_records():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("monitoring.access")
+    logger.addHandler(handler)
+    yield records
+    logger.removeHandler(handler)
+
+
+def test_access_log_has_timing_breakdown(
+        unlogged_client, access_records, post_with_published_location):
+    unlogged_client.get(f"/posts/{post_with_published_location.id}/")
+    (record,) = access_records
+    entry = json.loads(record.getMessage())
+    assert entry["view"] == "blog:post_detail"
+    assert entry["status"] == 200
+    assert entry["queries"] > 0 and entry["bytes"] > 0
+    assert entry["total_ms"] >= entry["db_ms"] > 0
+    assert entry["template_ms"] > 0
+
+
+def test_background_log_handler_drops_instead_of_blocking(tmp_path):
+    handler = BackgroundRotatingFileHandler(
+        tmp_path / "access.jsonl", queue_size=2)
+    release = threading.Event()
+    emit = handler.target.emit
+    handler.target.emit = lambda record: release.wait() and emit(record)
+    logger = logging.getLogger("monitoring.test_background")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        for index in range(10):
+            logger.warning("line %s", index)
+        assert handler.dropped >= 7
+    finally:
+        release.set()
+        logger.removeHandler(handler)
+        handler.close()
+    lines = (tmp_path / "access.jsonl").read_text().splitlines()
+    assert lines[0] == "line 0"
+    assert len(lines) == 10 - handler.dropped
+
+
+def test_import_report_survives_silent_failure(monkeypatch):
+    monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: (
+        subprocess.CompletedProcess(args, returncode=3, stdout="", stderr="")))
+    with pytest.raises(CommandError, match="кодом 3"):
+        call_command("import_report")
+
+
+@pytest.mark.django_db
+def test_bench_routes_with_wildcard_allowed_host(
+        settings, tmp_path, mixer, another_user, post_with_published_location):
+    settings.ALLOWED_HOSTS = ["*"]
+    mixer.blend("blog.Comment", post=post_with_published_location,
+                author=post_with_published_location.author)
+    mixer.blend(get_user_model())
+    output = tmp_path / "bench.json"
+    call_command("bench_routes", iterations=1, warmup=0,
+                 output=str(output), stdout=io.StringIO())
+    results = json.loads(output.read_text())["results"]
+    assert results["blog:index|anonymous"]["status"] == 200
+    assert all(row["status"] != 400 for row in results.values())
+
+
+def test_traced_requests_run_concurrently(settings, tmp_path, rf):
+    settings.MEMORY_PROFILING_DIR = tmp_path
+    inside = threading.Barrier(2, timeout=5)
+    responses = []
+
+    def get_response(request):
+        inside.wait()
+        return HttpResponse()
+
+    def traced():
+        responses.append(trace_request(get_response, rf.get("/")))
+
+    threads = [threading.Thread(target=traced) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(responses) == 2
+    assert not tracemalloc.is_tracing()
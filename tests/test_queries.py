@@ -0,0 +1,167 @@
+from http import HTTPStatus
+from typing import Callable, Optional
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+COMMENTS_PER_POST = 5
+
+
+def count_queries(
+        client: Client, url: str, method: str = "get",
+        data: Optional[dict] = None,
+) -> int:
+    with CaptureQueriesContext(connection) as captured:
+        response = getattr(client, method)(url, data or {})
+    assert response.status_code < HTTPStatus.INTERNAL_SERVER_ERROR, (
+        f"Убедитесь, что страница `{url}` загружается без ошибок."
+    )
+    return len(captured)
+
+
+def assert_constant_queries(
+        client: Client, url: str, grow: Callable[[], None],
+        max_queries: int, method: str = "get",
+        data: Optional[dict] = None,
+):
+    """Число запросов к БД не зависит от объёма данных и не превышает
+    `max_queries`. Первый запрос прогревает кэши (сессия, ContentType)."""
+    count_queries(client, url, method, data)
+    before = count_queries(client, url, method, data)
+    grow()
+    after = count_queries(client, url, method, data)
+    assert before == after, (
+        f"Число запросов к БД для `{url}` выросло с {before} до {after} "
+        "при увеличении объёма данных. Проверьте, нет ли проблемы N+1."
+    )
+    assert after <= max_queries, (
+        f"Страница `{url}` выполняет {after} запросов к БД, "
+        f"ожидалось не больше {max_queries}."
+    )
+
+
+@pytest.fixture
+def add_posts(mixer: Mixer, user, published_category, published_location):
+    def grow(author=user, n=N_PER_PAGE):
+        posts = mixer.cycle(n).blend(
+            "blog.Post", author=author, category=published_category,
+            location=published_location,
+        )
+        for post in posts:
+            mixer.cycle(COMMENTS_PER_POST).blend("blog.Comment", post=post)
+        return posts
+    return grow
+
+
+@pytest.fixture
+def user_post(add_posts, user):
+    return add_posts(user, 1)[0]
+
+
+@pytest.fixture
+def user_comment(mixer: Mixer, user, user_post):
+    return mixer.blend("blog.Comment", post=user_post, author=user)
+
+
+@pytest.fixture
+def admin_client_(mixer: Mixer):
+    admin = get_user_model().objects.create_superuser(
+        "admin", "admin@example.com", "password")
+    client = Client()
+    client.force_login(admin)
+    return client
+
+
+@pytest.mark.parametrize("viewer", ["unlogged_client", "user_client"])
+def test_index_queries(request, viewer, add_posts, user_post):
+    client = request.getfixturevalue(viewer)
+    assert_constant_queries(client, "/", add_posts, max_queries=6)
+
+
+@pytest.mark.parametrize("viewer", ["unlogged_client", "user_client"])
+def test_category_queries(
+        request, viewer, add_posts, user_post, published_category):
+    client = request.getfixturevalue(viewer)
+    assert_constant_queries(
+        client, f"/category/{published_category.slug}/", add_posts,
+        max_queries=7,
+    )
+
+
+@pytest.mark.parametrize(
+    "viewer", ["unlogged_client", "user_client", "another_user_client"])
+def test_profile_queries(request, viewer, add_posts, user_post, user):
+    client = request.getfixturevalue(viewer)
+    assert_constant_queries(
+        client, f"/profile/{user.username}/", add_posts, max_queries=7)
+
+
+@pytest.mark.parametrize(
+    "viewer", ["unlogged_client", "user_client", "another_user_client"])
+def test_post_detail_queries(request, viewer, mixer: Mixer, user_post):
+    client = request.getfixturevalue(viewer)
+    assert_constant_queries(
+        client, f"/posts/{user_post.id}/",
+        lambda: mixer.cycle(20).blend("blog.Comment", post=user_post),
+        max_queries=5,
+    )
+
+
+@pytest.mark.parametrize(
+    ("url", "max_queries"),
+    [
+        ("/posts/create/", 5),
+        ("/posts/{post.id}/edit/", 6),
+        ("/posts/{post.id}/delete/", 4),
+        ("/posts/{post.id}/edit_comment/{comment.id}/", 4),
+        ("/posts/{post.id}/delete_comment/{comment.id}/", 4),
+    ],
+)
+def test_crud_get_queries(
+        user_client, add_posts, user_post, user_comment, url, max_queries):
+    assert_constant_queries(
+        user_client, url.format(post=user_post, comment=user_comment),
+        add_posts, max_queries=max_queries,
+    )
+
+
+def test_add_comment_queries(user_client, mixer: Mixer, user_post):
+    assert_constant_queries(
+        user_client, f"/posts/{user_post.id}/comment/",
+        lambda: mixer.cycle(20).blend("blog.Comment", post=user_post),
+        max_queries=6, method="post", data={"text": "Комментарий"},
+    )
+
+
+def test_edit_comment_post_queries(
+        user_client, mixer: Mixer, user_post, user_comment):
+    assert_constant_queries(
+        user_client,
+        f"/posts/{user_post.id}/edit_comment/{user_comment.id}/",
+        lambda: mixer.cycle(20).blend("blog.Comment", post=user_post),
+        max_queries=6, method="post", data={"text": "Новый текст"},
+    )
+
+
+@pytest.mark.parametrize(
+    ("url", "max_queries"),
+    [
+        ("/admin/blog/post/", 9),
+        ("/admin/blog/comment/", 9),
+        ("/admin/blog/category/", 7),
+        ("/admin/blog/location/", 7),
+        ("/admin/auth/user/", 7),
+    ],
+)
+def test_admin_changelist_queries(
+        admin_client_, add_posts, user_post, url, max_queries):
+    assert_constant_queries(
+        admin_client_, url, add_posts, max_queries=max_queries)
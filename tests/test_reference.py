@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.checks import check_reference_cache
+from blog.reference import categories
+
+pytestmark = [pytest.mark.django_db]
+
+
+def reference_queries(client, url):
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, [
+        query["sql"] for query in context.captured_queries
+        if "blog_category" in query["sql"] or "blog_location" in query["sql"]
+    ]
+
+
+def test_feed_and_form_read_references_from_memory(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    response, queries = reference_queries(user_client, "/")
+    assert all("blog_location" not in sql for sql in queries)
+    assert post.location.name in response.content.decode()
+
+    response, queries = reference_queries(
+        user_client, f"/category/{post.category.slug}/")
+    assert all("blog_location" not in sql for sql in queries)
+
+    response, queries = reference_queries(user_client, "/posts/create/")
+    assert queries == []
+    choices = dict(response.context["form"].fields["category"].choices)
+    assert choices[post.category.pk] == str(post.category)
+
+
+def test_saved_category_is_visible_at_once(
+        user_client, published_category):
+    url = f"/category/{published_category.slug}/"
+    assert user_client.get(url).status_code == 200
+    published_category.is_published = False
+    published_category.save()
+    assert user_client.get(url).status_code == 404
+    assert not categories.get(published_category.pk).is_published
+
+
+def test_reference_version_requires_shared_cache(settings, tmp_path):
+    assert [error.id for error in check_reference_cache(None)] == [
+        "blog.E001"]
+    settings.CACHES = {"default": {
+        "BACKEND": "monitoring.cache.FileBasedCache",
+        "LOCATION": str(tmp_path)}}
+    assert check_reference_cache(None) == []
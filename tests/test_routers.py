@@ -0,0 +1,70 @@
+import pytest
+
+from core import routers
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def replica_reads(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = ["default"]
+    calls = []
+
+    def choice(replicas):
+        calls.append(replicas)
+        return "default"
+
+    monkeypatch.setattr(routers.random, "choice", choice)
+    return calls
+
+
+def test_read_only_views_read_from_replica(
+        replica_reads, unlogged_client, post_with_published_location):
+    unlogged_client.get(f"/posts/{post_with_published_location.id}/")
+    assert replica_reads
+    replica_reads.clear()
+    unlogged_client.get("/pages/about/")
+    assert not replica_reads
+
+
+def test_other_views_read_from_primary(
+        replica_reads, user_client, post_with_published_location):
+    user_client.get(f"/posts/{post_with_published_location.id}/edit/")
+    assert not replica_reads
+
+
+def test_writer_is_pinned_to_primary(
+        replica_reads, user_client, post_with_published_location):
+    post_id = post_with_published_location.id
+    response = user_client.post(
+        f"/posts/{post_id}/comment/", {"text": "Комментарий"})
+    assert routers.PIN_COOKIE in response.cookies
+    replica_reads.clear()
+    user_client.get(f"/posts/{post_id}/")
+    assert not replica_reads
+
+
+def test_missing_author_stats_do_not_pin(
+        replica_reads, unlogged_client, post_with_published_location):
+    from blog.models import AuthorStats
+
+    AuthorStats.objects.all().delete()
+    author = post_with_published_location.author
+    response = unlogged_client.get(f"/profile/{author.username}/")
+    assert routers.PIN_COOKIE not in response.cookies
+    assert response.context["stats"].total_posts == 1
+    assert not AuthorStats.objects.exists()
+
+
+def test_missing_category_stats_do_not_pin(
+        replica_reads, unlogged_client, post_with_published_location):
+    from blog.models import CategoryStats
+
+    CategoryStats.objects.all().delete()
+    category = post_with_published_location.category
+    for url in ("/category/", f"/category/{category.slug}/"):
+        response = unlogged_client.get(url)
+        assert routers.PIN_COOKIE not in response.cookies
+    (listed,) = response.context["page_obj"].object_list
+    assert listed == post_with_published_location
+    assert not CategoryStats.objects.exists()
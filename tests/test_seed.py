@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+SEED_SIZES = dict(
+    users=20, categories=30, locations=10, posts=200, comments=1000,
+    batch_size=64,
+)
+
+
+def _snapshot():
+    """Строки публикаций и комментариев с id относительно первого id."""
+    user = get_user_model().objects.order_by('pk').first().pk
+    category = Category.objects.order_by('pk').first().pk
+    post = Post.objects.order_by('pk').first().pk
+    return (
+        [
+            (author_id - user, category_id - category, is_published, title)
+            for author_id, category_id, is_published, title
+            in Post.objects.order_by('pk').values_list(
+                'author_id', 'category_id', 'is_published', 'title')
+        ],
+        [
+            (post_id - post, author_id - user, text)
+            for post_id, author_id, text
+            in Comment.objects.order_by('pk').values_list(
+                'post_id', 'author_id', 'text')
+        ],
+    )
+
+
+def test_seed_blog_creates_requested_rows():
+    call_command('seed_blog', seed=1, **SEED_SIZES)
+    assert get_user_model().objects.count() == SEED_SIZES['users']
+    assert Category.objects.count() == SEED_SIZES['categories']
+    assert Location.objects.count() == SEED_SIZES['locations']
+    assert Post.objects.count() == SEED_SIZES['posts']
+    assert Comment.objects.count() == SEED_SIZES['comments']
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists(), (
+        "Убедитесь, что среди сгенерированных публикаций есть отложенные."
+    )
+    assert Category.objects.filter(is_published=False).exists(), (
+        "Убедитесь, что среди сгенерированных категорий есть "
+        "неопубликованные."
+    )
+
+
+def test_seed_blog_is_deterministic():
+    call_command('seed_blog', seed=7, **SEED_SIZES)
+    first = _snapshot()
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+    Location.objects.all().delete()
+    get_user_model().objects.all().delete()
+    call_command('seed_blog', seed=7, **SEED_SIZES)
+    assert _snapshot() == first, (
+        "Убедитесь, что при одинаковом `--seed` генерируются одинаковые "
+        "данные."
+    )
+
+
+def test_seed_blog_comments_are_skewed():
+    call_command('seed_blog', seed=3, **SEED_SIZES)
+    per_post = sorted(
+        (post.comments.count() for post in Post.objects.all()),
+        reverse=True,
+    )
+    assert per_post[0] > 10 * per_post[len(per_post) // 2], (
+        "Убедитесь, что комментарии распределены по публикациям "
+        "неравномерно (по закону Ципфа)."
+    )
@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.checks import check_shared_cache
+from core.sessions import SessionStore
+
+pytestmark = [pytest.mark.django_db]
+
+
+def session_queries(client, url):
+    with CaptureQueriesContext(connection) as captured:
+        client.get(url)
+    return [
+        query for query in captured.captured_queries
+        if "django_session" in query["sql"]
+    ]
+
+
+def test_cached_copy_expires_after_session_cache_timeout(
+        settings, monkeypatch):
+    settings.SESSION_CACHE_TIMEOUT = 60
+    store = SessionStore()
+    store["value"] = "old"
+    store.save()
+    # Другой воркер изменил сессию: в этом воркере остался старый кэш.
+    Session.objects.filter(session_key=store.session_key).update(
+        session_data=store.encode({"value": "new"}))
+    assert SessionStore(store.session_key).load()["value"] == "old"
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert SessionStore(store.session_key).load()["value"] == "new"
+
+
+def test_authenticated_session_is_read_from_cache(user_client):
+    user_client.get("/")
+    assert not session_queries(user_client, "/")
+
+
+def test_expired_sessions_are_purged_in_batches(settings):
+    settings.SESSION_CLEANUP_BATCH = 2
+    now = timezone.now()
+    for index in range(5):
+        Session.objects.create(
+            session_key=f"expired{index:032}", session_data="",
+            expire_date=now - timedelta(days=1))
+    Session.objects.create(
+        session_key=f"alive{0:035}", session_data="",
+        expire_date=now + timedelta(days=1))
+    assert SessionStore.clear_expired() == 5
+    assert list(Session.objects.values_list("session_key", flat=True)) == [
+        f"alive{0:035}"]
+
+
+def test_cached_sessions_require_shared_cache(settings, tmp_path):
+    settings.MIDDLEWARE = []
+    settings.CACHES = {
+        "default": {"BACKEND": "monitoring.cache.FileBasedCache",
+                    "LOCATION": str(tmp_path)},
+        "sessions": {"BACKEND": "monitoring.cache.LocMemCache"},
+    }
+    assert check_shared_cache(None) == []
+    settings.SESSION_CACHE_ALIAS = "sessions"
+    errors = check_shared_cache(None)
+    assert [error.id for error in errors] == ["core.E001"]
+    assert "core.sessions" in errors[0].msg
@@ -0,0 +1,32 @@
+import pytest
+from django.db import connection
+
+from core.backends.sqlite3.base import DatabaseWrapper
+
+
+def pragma(cursor, name):
+    cursor.execute(f"PRAGMA {name}")
+    return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_pragmas_are_applied_on_connect(settings):
+    with connection.cursor() as cursor:
+        assert pragma(cursor, "busy_timeout") == (
+            settings.SQLITE_PRAGMAS["busy_timeout"])
+        assert pragma(cursor, "cache_size") == (
+            settings.SQLITE_PRAGMAS["cache_size"])
+        assert pragma(cursor, "synchronous") == 1
+        assert pragma(cursor, "temp_store") == 2
+
+
+def test_file_database_uses_wal(tmp_path):
+    wrapper = DatabaseWrapper(
+        {**connection.settings_dict, "NAME": str(tmp_path / "db.sqlite3")},
+        alias="wal_check",
+    )
+    raw = wrapper.get_new_connection(wrapper.get_connection_params())
+    try:
+        assert pragma(raw.cursor(), "journal_mode") == "wal"
+    finally:
+        raw.close()
@@ -0,0 +1,90 @@
+import pytest
+from django.contrib.auth.hashers import check_password, make_password
+from django.http.multipartparser import MultiPartParser
+from django.test.client import Client
+
+from core.hashers import PooledPBKDF2PasswordHasher
+from core.throttling import SlidingWindows, TokenBuckets
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def tight_limits(settings):
+    settings.RATE_LIMITS = {
+        "comment": {"user": (2, 60), "ip": (100, 60)},
+        "post": {"user": (1, 60), "ip": (100, 60)},
+    }
+
+
+def test_comment_burst_gets_429(
+        tight_limits, user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/comment/"
+    statuses = [
+        user_client.post(url, {"text": "Комментарий"}).status_code
+        for _ in range(3)
+    ]
+    assert statuses == [302, 302, 429]
+
+
+def test_limited_upload_is_not_parsed(
+        tight_limits, user_client, monkeypatch):
+    user_client.post("/posts/create/", {})
+    parsed = []
+    original = MultiPartParser.parse
+    monkeypatch.setattr(
+        MultiPartParser, "parse",
+        lambda self: parsed.append(1) or original(self))
+    response = user_client.post(
+        "/posts/create/", {"title": "x", "image": b"0" * 1024})
+    assert response.status_code == 429
+    assert int(response["Retry-After"]) > 0
+    assert not parsed
+
+
+def test_token_bucket_refills():
+    buckets = TokenBuckets(max_keys=10)
+    limits = [("key", 2, 10)]
+    assert buckets.take(limits, now=0) == 0
+    assert buckets.take(limits, now=0) == 0
+    assert buckets.take(limits, now=1) == pytest.approx(4)
+    assert buckets.take(limits, now=5) == 0
+
+
+def test_login_is_throttled_by_username_before_hashing(
+        settings, user, monkeypatch):
+    settings.AUTH_THROTTLES = {
+        "login": {"user": (2, 300), "ip": (100, 300)},
+    }
+    user.set_password("password")
+    user.save()
+    hashed = []
+    original = PooledPBKDF2PasswordHasher.encode
+    monkeypatch.setattr(
+        PooledPBKDF2PasswordHasher, "encode",
+        lambda *args: hashed.append(1) or original(*args))
+    statuses = [
+        Client(REMOTE_ADDR=f"10.0.0.{index}").post(
+            "/auth/login/", {"username": user.username, "password": "bad"}
+        ).status_code
+        for index in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+    assert len(hashed) == 2
+
+
+def test_sliding_window_frees_oldest_slot():
+    windows = SlidingWindows(max_keys=10)
+    limits = [("key", 2, 10)]
+    assert windows.hit(limits, now=0) == 0
+    assert windows.hit(limits, now=4) == 0
+    assert windows.hit(limits, now=5) == pytest.approx(5)
+    assert windows.hit(limits, now=10) == 0
+
+
+def test_pooled_hasher_matches_inline(settings):
+    settings.PASSWORD_HASHING_POOL_SIZE = 1
+    pooled = make_password("password", salt="salt1234")
+    settings.PASSWORD_HASHING_POOL_SIZE = 0
+    assert pooled == make_password("password", salt="salt1234")
+    assert check_password("password", pooled)
@@ -0,0 +1,70 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.checks import check_shared_cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+def user_queries(client, url):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+    return response, [
+        query for query in captured.captured_queries
+        if 'FROM "auth_user"' in query["sql"]
+    ]
+
+
+def test_user_is_resolved_from_cache(user_client, user):
+    user_client.get("/posts/create/")
+    response, queries = user_queries(user_client, "/posts/create/")
+    assert response.status_code == 200
+    assert not queries
+    assert user.username in response.content.decode()
+
+
+def test_user_save_invalidates_cache(user_client, user):
+    user_client.get("/posts/create/")
+    user.username = "renamed"
+    user.save()
+    response, queries = user_queries(user_client, "/posts/create/")
+    assert queries
+    assert "renamed" in response.content.decode()
+
+
+def test_password_change_logs_out_other_sessions(user_client, user):
+    user_client.get("/posts/create/")
+    user.set_password("another-password")
+    user.save()
+    assert user_client.get("/posts/create/").status_code == 302
+
+
+def test_logout_drops_cached_user(user_client):
+    user_client.get("/posts/create/")
+    user_client.get("/auth/logout/")
+    assert user_client.get("/posts/create/").status_code == 302
+
+
+def test_profile_edit_does_not_save_cached_user(user_client, user):
+    user_client.get("/posts/create/")
+    password = make_password("changed-elsewhere")
+    get_user_model().objects.filter(pk=user.pk).update(password=password)
+    response = user_client.post("/profile/edit/", {
+        "username": user.username, "date_joined": "2020-01-01 00:00",
+        "is_active": "on"})
+    assert response.status_code == 302
+    assert get_user_model().objects.get(pk=user.pk).password == password
+
+
+@pytest.mark.parametrize("backend, errors", [
+    ("monitoring.cache.LocMemCache", ["core.E001", "core.E001"]),
+    ("monitoring.cache.FileBasedCache", []),
+])
+def test_cached_auth_requires_shared_cache(tmp_path, backend, errors):
+    with override_settings(CACHES={"default": {
+            "BACKEND": backend, "LOCATION": str(tmp_path)}}):
+        assert [error.id for error in check_shared_cache(None)] == errors
@@ -0,0 +1,48 @@
+import importlib
+import sys
+
+from django.contrib.auth.password_validation import (
+    get_default_password_validators)
+from django.template import engines
+from django.test import override_settings
+from django.urls import get_resolver
+
+from core.warmup import warmup
+
+
+def test_warmup_compiles_urls_templates_and_validators():
+    get_default_password_validators.cache_clear()
+    result = warmup()
+    assert result["urls"] > 10 and result["templates"] > 20
+    assert get_default_password_validators.cache_info().currsize == 1
+    assert get_resolver()._populated
+
+
+def test_warmup_fills_cached_loader(settings):
+    loaders = [("monitoring.loaders.CachedLoader",
+                settings.TEMPLATE_LOADERS)]
+    templates = [{**settings.TEMPLATES[0], "OPTIONS": {
+        **settings.TEMPLATES[0]["OPTIONS"], "loaders": loaders}}]
+    with override_settings(TEMPLATES=templates):
+        warmup()
+        (loader,) = engines["django"].engine.template_loaders
+        assert "blog/index.html" in loader.get_template_cache
+
+
+def test_production_settings_drop_dev_apps(monkeypatch):
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "secret")
+    production = importlib.import_module("blogicum.settings_production")
+    assert "django_extensions" not in production.INSTALLED_APPS
+    assert production.WARMUP and not production.DEBUG
+
+
+def test_production_settings_keep_replicas(monkeypatch, tmp_path):
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "secret")
+    monkeypatch.setenv("DATABASE_REPLICA_FILES", str(tmp_path / "r.sqlite3"))
+    for name in ("blogicum.settings", "blogicum.settings_production"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    production = importlib.import_module("blogicum.settings_production")
+    assert production.DATABASE_REPLICAS == ["replica1"]
+    assert set(production.DATABASES) == {"default", "replica1"}
+    assert all(params["CONN_MAX_AGE"] == 60
+               for params in production.DATABASES.values())
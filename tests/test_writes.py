@@ -0,0 +1,99 @@
+import threading
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connections, transaction
+from PIL import Image
+
+from blog.models import Comment, Post
+from core.writes import write
+from monitoring.metrics import registry
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def batch_sizes():
+    histograms = registry.snapshot()["histograms"]
+    row = histograms.get('["blogicum_write_batch_size", []]', [0, 0.0])
+    return sum(row[:-1]), row[-1]
+
+
+def test_concurrent_writes_are_group_committed(
+        write_queue, post_with_published_location, user):
+    post = post_with_published_location
+    batches, jobs = batch_sizes()
+    errors = []
+
+    def add_comment(index):
+        try:
+            write(Comment(
+                text=f"Комментарий {index}", post=post, author=user).save)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=add_comment, args=(index,))
+        for index in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert Comment.objects.filter(post=post).count() == 20
+    new_batches, new_jobs = batch_sizes()
+    assert new_jobs - jobs == 20
+    assert new_batches - batches < 20
+
+
+def test_failed_write_does_not_abort_batch(
+        write_queue, post_with_published_location, user):
+    post = post_with_published_location
+    with pytest.raises(IntegrityError):
+        write(Comment(text="Без автора", post=post).save)
+    write(Comment(text="С автором", post=post, author=user).save)
+    assert list(Comment.objects.values_list("text", flat=True)) == [
+        "С автором"]
+
+
+def test_write_inside_atomic_block_runs_inline(
+        write_queue, post_with_published_location, user):
+    post = post_with_published_location
+    threads = []
+
+    def add_comment():
+        threads.append(threading.current_thread())
+        Comment.objects.create(text="В транзакции", post=post, author=user)
+
+    with transaction.atomic():
+        Post.objects.filter(pk=post.pk).update(title="Изменено")
+        write(add_comment)
+    assert threads == [threading.current_thread()]
+    assert Comment.objects.filter(post=post).count() == 1
+
+
+def test_uploads_are_stored_outside_the_writer(
+        write_queue, user_client, published_category, monkeypatch):
+    threads = []
+    save = default_storage.save
+
+    def recording_save(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return save(*args, **kwargs)
+
+    monkeypatch.setattr(default_storage, "save", recording_save)
+    content = BytesIO()
+    Image.new("RGB", (10, 10)).save(content, format="PNG")
+    response = user_client.post("/posts/create/", {
+        "title": "С картинкой", "text": "Текст",
+        "pub_date": "2020-01-01T00:00", "category": published_category.pk,
+        "image": SimpleUploadedFile(
+            "upload.png", content.getvalue(), "image/png"),
+    })
+    assert response.status_code == 302
+    assert threads == [threading.current_thread()]
+    default_storage.delete(Post.objects.get().image.name)